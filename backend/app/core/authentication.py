@@ -0,0 +1,65 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Student
+
+# embedded by AuthService.generate_jwt_tokens; only a lookup hint, always re-checked against user_id
+STUDENT_ID_CLAIM = "student_id"
+
+
+class StudentJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the User together with its Student in one joined query and
+    exposes the result as ``request.student`` (None when the user has no student record).
+    A ``student_id`` claim lets the lookup go by primary key; a stale or missing claim falls
+    back to the user's one-to-one link.
+    """
+
+    def authenticate(self, request):
+        self.student = None
+        result = super().authenticate(request)
+        if result is not None:
+            request.student = self.student
+            # visible to plain Django code (middleware) as well
+            request._request.student = self.student
+        return result
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_FIELD != "id":
+            user = super().get_user(validated_token)
+            self.student = Student.objects.filter(user=user).first()
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # mastery rides along so the dashboard views read it without another query
+        students = Student.objects.select_related("user", "mastery")
+        student = None
+        claimed = validated_token.get(STUDENT_ID_CLAIM)
+        if claimed is not None:
+            student = students.filter(pk=claimed, user_id=user_id).first()
+        if student is None:
+            student = students.filter(user_id=user_id).first()
+
+        if student is not None:
+            user = student.user
+        else:
+            try:
+                user = self.user_model.objects.get(pk=user_id)
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        self.student = student
+        return user
@@ -0,0 +1,45 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import StudentCourseProgress
+from .services.catalog import catalog_version
+
+
+def student_etag(scope: str, daily: bool = False):
+    """
+    ``etag_func`` for django's ``condition`` decorator on per-student dashboard views.
+
+    The validator is the catalog version plus the student's progress rows (every attempt write
+    upserts them, bumping ``updated_at``) and mastery vector: one cache read and one indexed
+    aggregate, evaluated before the view does any real work. ``daily`` folds in today's date for
+    payloads that age with the clock (recency features, counted in calendar days).
+    """
+    def etag(request, *args, **kwargs):
+        student = getattr(request, "student", None)
+        if student is None:
+            return None
+        state = StudentCourseProgress.objects.filter(student=student).aggregate(n=Count("id"), last=Max("updated_at"))
+        # loaded with the student by StudentJWTAuthentication; rebuild_mastery changes it without touching progress
+        mastery = getattr(student, "mastery", None)
+        parts = [
+            scope, student.id, catalog_version(), state["n"], state["last"].isoformat() if state["last"] else "",
+            mastery.updated_at.isoformat() if mastery else "",
+        ]
+        if daily:
+            # same day boundary as recommender.recency_gap_days
+            parts.append(timezone.localdate().isoformat())
+        return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:32]
+    return etag
+
+
+def student_conditional(scope: str, daily: bool = False):
+    """Method decorator: answer ``If-None-Match`` with 304 and make clients revalidate every poll."""
+    return method_decorator([
+        cache_control(private=True, no_cache=True),
+        condition(etag_func=student_etag(scope, daily=daily)),
+    ])
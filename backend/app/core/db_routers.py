@@ -0,0 +1,54 @@
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.utils.decorators import method_decorator
+
+PRIMARY_ALIAS = "default"
+REPLICA_ALIAS = getattr(settings, "DATABASE_REPLICA_ALIAS", "replica")
+
+# set for the duration of a read-only view; copied into sync_to_async threads with the context
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_only(view_func):
+    """View decorator: reads inside the handler may go to the replica; writes still go to the primary."""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view_func(*args, **kwargs)
+    return wrapper
+
+
+read_only_method = method_decorator(read_only)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads made inside ``replica_reads()`` use the replica alias when one is configured; everything
+    else, and every write, uses the primary. Authentication runs before the handler, so a freshly
+    registered user is always found on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and REPLICA_ALIAS in settings.DATABASES:
+            return REPLICA_ALIAS
+        return PRIMARY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # an instance read from the replica is still saved to the primary
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # same data on both aliases
+        return True
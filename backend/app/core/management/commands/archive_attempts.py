@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.rollups import archive_attempts
+
+
+class Command(BaseCommand):
+    help = 'Move raw attempts older than --older-than-days into the ArchivedAttempt cold table (rollups are kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, required=True)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+        started = time.perf_counter()
+        moved = 0
+        for count in archive_attempts(options['older_than_days'], batch_size=max(options['batch_size'], 1)):
+            moved += count
+        elapsed = time.perf_counter() - started
+        rate = moved / elapsed if elapsed > 0 else float('inf')
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} attempts in {elapsed:.2f}s ({rate:.0f} rows/sec).'))
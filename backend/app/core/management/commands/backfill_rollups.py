@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.progress import rebuild_progress
+from core.services.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'First deployment only: build AttemptDailyRollup rows from raw and archived attempts, then the '
+        'progress rows derived from them. Students who already have rollups are skipped unless --force'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students',
+                            help='Only rebuild rows for this student id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Students per transaction')
+        parser.add_argument('--force', action='store_true',
+                            help='Also rebuild students who have rollups, discarding history older than their raw attempts')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = skipped = 0
+        for count, skip in backfill_rollups(student_ids=options['students'], batch_size=max(options['batch_size'], 1),
+                                            force=options['force']):
+            written += count
+            skipped += skip
+        progress = rebuild_progress(student_ids=options['students'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {written} daily rollups and {progress} progress rows in {elapsed:.2f}s.'
+        ))
+        if skipped:
+            self.stdout.write(f'Skipped {skipped} students who already have rollups (use --force to rebuild them).')
@@ -0,0 +1,107 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core.db_routers import REPLICA_ALIAS
+from core.services.benchmark import ENDPOINTS, QUERY_BUDGETS, bench_context, budget_violations, compare, run_benchmarks
+from core.services.seeding import seed_bulk
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint (p50/p95 latency, queries, peak memory) against seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--lessons-per-course', type=int, default=10)
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--attempts-per-student', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Only benchmark this endpoint name (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--compare', help='Baseline JSON report; fail on query-count regressions')
+        parser.add_argument('--latency-tolerance', type=float, default=0.0,
+                            help='With --compare, also fail when p95 grows by more than this fraction (e.g. 0.25)')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Benchmark the configured database as-is instead of a seeded throwaway one; '
+                                 'endpoints that write (attempts, register, login, refresh, logout) are skipped')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        password = 'password'
+        old_name = None
+        setup_test_environment()
+        try:
+            if not options['current_db']:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                if REPLICA_ALIAS in connections:
+                    # replica reads must see the throwaway database, not the real replica
+                    connections[REPLICA_ALIAS].close()
+                    connections[REPLICA_ALIAS].creation.set_as_test_mirror(connection.settings_dict)
+                started = time.perf_counter()
+                counts = seed_bulk(
+                    options['courses'], options['lessons_per_course'], options['students'],
+                    options['attempts_per_student'], seed=options['seed'], password=password,
+                    log=lambda line: self.stdout.write(f'  seeded {line}'),
+                )
+                self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+            else:
+                counts = None
+            try:
+                ctx = bench_context(password, read_only=options['current_db'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            if options['current_db']:
+                skipped = [e.name for e in ENDPOINTS if e.writes]
+                self.stdout.write(f"Skipping endpoints that write to the configured database: {', '.join(skipped)}")
+            results = run_benchmarks(ctx, options['iterations'], only=options['endpoints'],
+                                     read_only=options['current_db'])
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'seeded': counts,
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'endpoints': results,
+        }
+
+        self.stdout.write(f"{'endpoint':<26}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KiB':>11}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<26}{r['status']:>7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['queries']:>9}{r['peak_kb']:>11.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        failures = budget_violations(results, QUERY_BUDGETS)
+        if baseline is not None:
+            lines, regressions = compare(baseline.get('endpoints', {}), results, options['latency_tolerance'])
+            self.stdout.write('Compared with baseline:')
+            for line in lines:
+                self.stdout.write(f'  {line}')
+            failures += regressions
+        if failures:
+            raise CommandError('Performance budget exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
@@ -0,0 +1,69 @@
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+
+from core.models import Student, StudentCourseProgress
+from core.services.catalog import get_catalog
+from core.services.recommendation_snapshots import chunked, compute_snapshots, worker_chunk, worker_init
+
+
+class Command(BaseCommand):
+    help = 'Precompute RecommendationSnapshot rows for every student (or those active since --since)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only students with progress updated at or after this ISO date/datetime')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 0 computes in this process')
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Invalid --since value: {value!r}')
+            since = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def handle(self, *args, **options):
+        since = self.parse_since(options['since'])
+        if since is None:
+            student_ids = Student.objects.order_by('id').values_list('id', flat=True)
+        else:
+            student_ids = (
+                StudentCourseProgress.objects.filter(updated_at__gte=since)
+                .order_by('student_id').values_list('student_id', flat=True).distinct()
+            )
+        student_ids = list(student_ids)
+        chunks = list(chunked(student_ids, max(options['chunk_size'], 1)))
+        catalog = get_catalog()
+
+        started = time.perf_counter()
+        written = 0
+        if options['workers'] <= 0 or len(chunks) <= 1:
+            for chunk in chunks:
+                written += compute_snapshots(chunk, catalog)
+        else:
+            # children are forked: drop our connections first so none is shared across processes
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=worker_init,
+                                     initargs=(catalog,)) as pool:
+                for count in pool.map(worker_chunk, chunks):
+                    written += count
+        elapsed = time.perf_counter() - started
+
+        rate = len(student_ids) / elapsed if elapsed > 0 else float('inf')
+        self.stdout.write(self.style.SUCCESS(
+            f'Precomputed {written} snapshots for {len(student_ids)} students '
+            f'in {elapsed:.2f}s ({rate:.0f} students/sec).'
+        ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.mastery import rebuild_mastery
+
+
+class Command(BaseCommand):
+    help = 'Recompute StudentMastery vectors from the daily attempt rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students',
+                            help='Only rebuild the vector of this student id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Students per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = 0
+        for count in rebuild_mastery(student_ids=options['students'], batch_size=max(options['batch_size'], 1)):
+            written += count
+        elapsed = time.perf_counter() - started
+        rate = written / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} mastery vectors in {elapsed:.2f}s ({rate:.0f} students/s).'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core.services.progress import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the denormalized StudentCourseProgress table from the daily attempt rollups '
+            '(AttemptDailyRollup); archived attempts count only through their rollups')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students',
+                            help='Only rebuild rows for this student id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_progress(student_ids=options['students'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} progress rows.'))
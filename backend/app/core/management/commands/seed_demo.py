@@ -1,10 +1,28 @@
+import time
+from datetime import date
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from core.models import Student, Course, Lesson, Attempt
+from core.services.seeding import seed_bulk
 
 class Command(BaseCommand):
-    help='Create demo data'
-    def handle(self, *args, **kwargs):
+    help='Create demo data, or with --students/--courses a large deterministic synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=0, help='Generate this many students (with user accounts)')
+        parser.add_argument('--courses', type=int, default=0, help='Generate this many courses')
+        parser.add_argument('--lessons-per-course', type=int, default=10)
+        parser.add_argument('--attempts-per-student', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; same seed and anchor, same data')
+        parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                            help='Day (YYYY-MM-DD) the generated attempt history ends at; defaults to today')
+        parser.add_argument('--password', default='password', help='Password shared by generated users')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['students'] or options['courses']:
+            return self.generate(options)
         s,_=Student.objects.get_or_create(email='ananya@example.com', defaults={'name':'Ananya'})
         c1,_=Course.objects.get_or_create(name='Python Basics', defaults={'description':'Intro to Python','difficulty':1})
         c2,_=Course.objects.get_or_create(name='JavaScript Foundations', defaults={'description':'JS core','difficulty':2})
@@ -14,5 +32,18 @@ class Command(BaseCommand):
         mk(c2,1,'Arrays',['arrays']); mk(c2,2,'Conditions',['conditions'])
         mk(c3,1,'What is AI?',['logic','data'])
         l=Lesson.objects.filter(course=c1).first()
-        if l: Attempt.objects.get_or_create(student=s, lesson=l, timestamp=timezone.now(), correctness=0.6, hints_used=1, duration_sec=600)
-        self.stdout.write(self.style.SUCCESS('Seeded demo data.'))
\ No newline at end of file
+        if l: Attempt.objects.get_or_create(student=s, lesson=l, defaults={'timestamp':timezone.now(),'correctness':0.6,'hints_used':1,'duration_sec':600})
+        self.stdout.write(self.style.SUCCESS('Seeded demo data.'))
+
+    def generate(self, options):
+        started = time.perf_counter()
+        counts = seed_bulk(
+            options['courses'], options['lessons_per_course'], options['students'], options['attempts_per_student'],
+            seed=options['seed'], password=options['password'], batch_size=options['batch_size'], anchor=options['anchor'],
+            log=lambda line: self.stdout.write(f'  {line} ({time.perf_counter() - started:.1f}s)'),
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {counts['students']} students, {counts['courses']} courses, {counts['lessons']} lessons "
+            f"and {counts['attempts']} attempts in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Lesson
+from core.services.tags import sync_lesson_tags
+
+
+class Command(BaseCommand):
+    help = 'Re-sync the normalized Tag/LessonTag index from every lesson\'s JSON tags (e.g. after queryset.update())'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        lessons = Lesson.objects.only('id', 'tags').order_by('id')
+        changed = sync_lesson_tags(lessons.iterator(chunk_size=options['batch_size']), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Synced lesson tags ({changed} index rows added or removed).'))
@@ -0,0 +1,106 @@
+import contextvars
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .services.metrics import record_request
+
+SERVER_TIMING = getattr(settings, "PERF_SERVER_TIMING", True)
+
+# the stats of the request being served; asgiref copies the context into sync_to_async threads,
+# so queries an async view (or a concurrent loader) runs elsewhere still count towards it
+_current_stats = contextvars.ContextVar("request_query_stats", default=None)
+
+
+class QueryStats:
+    """``execute_wrapper`` hook counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.seconds += elapsed
+                self.count += 1
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_hook(sender, connection, **kwargs):
+    # connections are per thread: hook each one as it connects, whichever thread that is
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, DB query count/time and response size per resolved URL name into the
+    in-process histograms served at /api/metrics/, and adds a ``Server-Timing`` header.
+
+    Works in both sync and async mode, so async views (the dashboard) stay async under ASGI.
+    Queries are counted on every connection the request's context touches, including those
+    of sync_to_async worker threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # connections opened before this module was imported never fired connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_hook(None, connection)
+        stats, started = QueryStats(), time.perf_counter()
+        token = _current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, started = QueryStats(), time.perf_counter()
+        token = _current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        duration = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match and match.view_name else "unmatched"
+        size = None if response.streaming else len(response.content)
+        record_request(route, response.status_code, duration, stats.count, stats.seconds, size)
+
+        if SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'app;dur={(duration - stats.seconds) * 1000:.1f}, '
+                f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
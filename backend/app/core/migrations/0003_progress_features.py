@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_studentcourseprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentcourseprogress',
+            name='covered_tags',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='studentcourseprogress',
+            name='hint_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentcourseprogress',
+            name='hint_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
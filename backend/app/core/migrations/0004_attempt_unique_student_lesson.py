@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:42
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def dedupe_attempts(apps, schema_editor):
+    """Keep only the latest attempt (by timestamp, then id) for every (student, lesson) pair."""
+    Attempt = apps.get_model('core', 'Attempt')
+    StudentCourseProgress = apps.get_model('core', 'StudentCourseProgress')
+
+    duplicated = (
+        Attempt.objects.order_by()
+        .values('student_id', 'lesson_id', 'lesson__course_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    touched = set()
+    for group in duplicated.iterator():
+        ids = list(
+            Attempt.objects.filter(student_id=group['student_id'], lesson_id=group['lesson_id'])
+            .order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        Attempt.objects.filter(id__in=ids[1:]).delete()
+        touched.add((group['student_id'], group['lesson__course_id']))
+
+    # the derived counters included the removed rows
+    for student_id, course_id in touched:
+        totals = Attempt.objects.filter(student_id=student_id, lesson__course_id=course_id).aggregate(
+            n=Count('id'), hints=Sum('hints_used'),
+        )
+        StudentCourseProgress.objects.filter(student_id=student_id, course_id=course_id).update(
+            attempt_count=totals['n'], hint_count=totals['n'], hint_sum=totals['hints'] or 0,
+            progress=min(100, totals['n'] * 10),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_progress_features'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_attempts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attempt',
+            constraint=models.UniqueConstraint(fields=('student', 'lesson'), name='uniq_attempt_student_lesson'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_attempt_unique_student_lesson'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField(default=dict)),
+                ('catalog_fingerprint', models.CharField(max_length=40)),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_snapshot', to='core.student')),
+            ],
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_rollups(apps, schema_editor):
+    """One rollup per existing attempt (one per student and lesson), so progress keeps its history."""
+    Attempt = apps.get_model('core', 'Attempt')
+    AttemptDailyRollup = apps.get_model('core', 'AttemptDailyRollup')
+    batch = []
+    for pk, student_id, lesson_id, ts, correctness, hints, duration in Attempt.objects.order_by('id').values_list(
+            'id', 'student_id', 'lesson_id', 'timestamp', 'correctness', 'hints_used', 'duration_sec').iterator():
+        batch.append(AttemptDailyRollup(
+            student_id=student_id, lesson_id=lesson_id, day=timezone.localdate(ts), attempt_count=1,
+            correctness_sum=correctness, hints_sum=hints, duration_sum=duration, last_timestamp=ts,
+            last_attempt_id=pk, last_correctness=correctness, last_hints_used=hints, last_duration_sec=duration,
+        ))
+        if len(batch) >= 5000:
+            AttemptDailyRollup.objects.bulk_create(batch)
+            batch = []
+    AttemptDailyRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recommendationsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttempt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('correctness', models.FloatField()),
+                ('hints_used', models.PositiveIntegerField(default=0)),
+                ('duration_sec', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField()),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'timestamp'], name='core_archiv_student_8a13bf_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttemptDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('correctness_sum', models.FloatField(default=0.0)),
+                ('hints_sum', models.PositiveIntegerField(default=0)),
+                ('duration_sum', models.PositiveIntegerField(default=0)),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_attempt_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_correctness', models.FloatField(default=0.0)),
+                ('last_hints_used', models.PositiveIntegerField(default=0)),
+                ('last_duration_sec', models.PositiveIntegerField(default=0)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_rollups', to='core.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'lesson', 'day'), name='uniq_rollup_student_lesson_day')],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
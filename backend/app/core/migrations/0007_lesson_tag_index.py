@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_lesson_tags(apps, schema_editor):
+    """Fill Tag/LessonTag from every lesson's JSON tags (same normalization as services.tags)."""
+    Lesson = apps.get_model('core', 'Lesson')
+    Tag = apps.get_model('core', 'Tag')
+    LessonTag = apps.get_model('core', 'LessonTag')
+    pairs = []
+    for lesson_id, tags in Lesson.objects.values_list('id', 'tags').iterator():
+        names = {str(t).strip().lower() for t in (tags or ()) if str(t).strip()}
+        pairs.extend((lesson_id, name) for name in sorted(names))
+    Tag.objects.bulk_create([Tag(name=n) for n in sorted({n for _, n in pairs})], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    LessonTag.objects.bulk_create(
+        [LessonTag(lesson_id=lesson_id, tag_id=tag_ids[name]) for lesson_id, name in pairs],
+        batch_size=5000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_attempt_rollups_and_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LessonTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_tags', to='core.lesson')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_tags', to='core.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='lessons', through='core.LessonTag', to='core.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='lessontag',
+            index=models.Index(fields=['tag', 'lesson'], name='core_lesson_tag_id_5bad4d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lessontag',
+            constraint=models.UniqueConstraint(fields=('lesson', 'tag'), name='uniq_lesson_tag'),
+        ),
+        migrations.RunPython(index_lesson_tags, migrations.RunPython.noop),
+    ]
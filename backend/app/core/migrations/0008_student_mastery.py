@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_lesson_tag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vector', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mastery', to='core.student')),
+            ],
+        ),
+    ]
@@ -26,12 +26,30 @@ class Lesson(models.Model):
     title = models.CharField(max_length=200)
     tags = models.JSONField(default=list, blank=True)
     order_index = models.PositiveIntegerField(default=0)
+    # normalized mirror of ``tags``, kept in sync by core.signals / services.tags
+    tag_set = models.ManyToManyField('Tag', through='LessonTag', related_name='lessons', blank=True)
 
     class Meta: ordering = ['order_index']
 
     def __str__(self): return f"{self.course.name}: {self.title}"
 
 
+class Tag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+
+    def __str__(self): return self.name
+
+
+class LessonTag(models.Model):
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='lesson_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='lesson_tags')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['lesson', 'tag'], name='uniq_lesson_tag')]
+        # tag -> lessons lookups (?tag= filters); the constraint's index serves lesson -> tags
+        indexes = [models.Index(fields=['tag', 'lesson'])]
+
+
 class Attempt(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attempts')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='attempts')
@@ -41,4 +59,104 @@ class Attempt(models.Model):
     duration_sec = models.PositiveIntegerField(default=0)
 
 
-    class Meta: indexes = [models.Index(fields=['student', 'timestamp'])]
+    class Meta:
+        indexes = [models.Index(fields=['student', 'timestamp'])]
+        # one row per (student, lesson): the latest attempt, written with a single upsert statement
+        constraints = [models.UniqueConstraint(fields=['student', 'lesson'], name='uniq_attempt_student_lesson')]
+
+
+class StudentCourseProgress(models.Model):
+    """
+    Denormalized per-(student, course) summary kept in sync on every attempt write.
+    Doubles as the recommender's feature store (last attempt, hint totals, tag coverage).
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_progress')
+    attempt_count = models.PositiveIntegerField(default=0)
+    progress = models.PositiveSmallIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    next_lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    hint_sum = models.PositiveIntegerField(default=0)
+    hint_count = models.PositiveIntegerField(default=0)
+    covered_tags = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['student', 'course'], name='uniq_progress_student_course')]
+
+    def __str__(self): return f"{self.student} / {self.course}: {self.progress}%"
+
+
+class RecommendationSnapshot(models.Model):
+    """
+    Precomputed recommendation payload per student, written by ``precompute_recommendations``.
+    Served only while fresh: younger than the max age, computed today (recency counts calendar
+    days), newer than the student's last progress and mastery updates, and computed against the
+    current catalog.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='recommendation_snapshot')
+    payload = models.JSONField(default=dict)
+    catalog_fingerprint = models.CharField(max_length=40)
+    computed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self): return f"{self.student} @ {self.computed_at:%Y-%m-%d %H:%M}"
+
+
+class AttemptDailyRollup(models.Model):
+    """
+    Per-(student, lesson, day) aggregate of every attempt write, incremented in the same
+    transaction as the write. Unlike ``Attempt`` (latest attempt per lesson) it keeps the full
+    history in counts and sums, and it survives archival of the raw rows. ``last_*`` describe
+    the day's latest attempt, so a student's newest rollup per lesson stands in for the raw row.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attempt_rollups')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    attempt_count = models.PositiveIntegerField(default=0)
+    correctness_sum = models.FloatField(default=0.0)
+    hints_sum = models.PositiveIntegerField(default=0)
+    duration_sum = models.PositiveIntegerField(default=0)
+    last_timestamp = models.DateTimeField()
+    last_attempt_id = models.BigIntegerField(null=True, blank=True)
+    last_correctness = models.FloatField(default=0.0)
+    last_hints_used = models.PositiveIntegerField(default=0)
+    last_duration_sec = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'lesson', 'day'], name='uniq_rollup_student_lesson_day'),
+        ]
+
+    @property
+    def mean_correctness(self) -> float:
+        return self.correctness_sum / self.attempt_count if self.attempt_count else 0.0
+
+    def __str__(self): return f"{self.student} / {self.lesson_id} @ {self.day}: {self.attempt_count}"
+
+
+class ArchivedAttempt(models.Model):
+    """Cold storage for raw attempts moved out of ``Attempt`` by ``archive_attempts``; keeps the original id."""
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='+')
+    timestamp = models.DateTimeField()
+    correctness = models.FloatField()
+    hints_used = models.PositiveIntegerField(default=0)
+    duration_sec = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['student', 'timestamp'])]
+
+
+class StudentMastery(models.Model):
+    """
+    Per-student mastery vector: an exponentially weighted attempt score per tag, stored as packed
+    little-endian float32 indexed by ``Tag.id - 1`` (NaN for tags never attempted). Updated in
+    place on each attempt write; see ``core.services.mastery``.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='mastery')
+    vector = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self): return f"{self.student}: {len(self.vector) // 4} tags"
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AttemptCursorPagination(CursorPagination):
+    """Keyset pagination over the (student, timestamp) index, newest first."""
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -20,6 +20,22 @@ class AttemptCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attempt
         fields = ['id', 'student', 'lesson', 'timestamp', 'correctness', 'hints_used', 'duration_sec']
+        # the student always comes from the authenticated request, never from the payload
+        read_only_fields = ['student']
+
+    def validate_correctness(self, v):
+        if not (0.0 <= v <= 1.0):
+            raise serializers.ValidationError('Correctness must be between 0 and 1.')
+        return v
+
+
+class AttemptBatchItemSerializer(serializers.Serializer):
+    """One item of POST /api/attempts/batch/; the lesson is checked for the whole batch in one query."""
+    lesson = serializers.IntegerField(min_value=1)
+    timestamp = serializers.DateTimeField()
+    correctness = serializers.FloatField()
+    hints_used = serializers.IntegerField(min_value=0, default=0)
+    duration_sec = serializers.IntegerField(min_value=0, default=0)
 
     def validate_correctness(self, v):
         if not (0.0 <= v <= 1.0):
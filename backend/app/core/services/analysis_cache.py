@@ -0,0 +1,109 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.services.code_analysis import ENGINE_VERSION, RULES, analyze
+
+CACHE_SIZE = getattr(settings, "ANALYZE_CODE_CACHE_SIZE", 1024)
+# optional django cache alias shared by all workers (e.g. a redis-backed "default")
+CACHE_ALIAS = getattr(settings, "ANALYZE_CODE_CACHE_ALIAS", None)
+CACHE_TIMEOUT = getattr(settings, "ANALYZE_CODE_CACHE_TIMEOUT", 24 * 60 * 60)
+
+
+class LRUCache:
+    """Small thread-safe LRU used as the per-process layer."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local = LRUCache(CACHE_SIZE)
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def ruleset_version() -> str:
+    """Changes whenever the engine version or the registered rule set changes."""
+    signature = ";".join(f"{r.name}:{r.severity}" for r in RULES)
+    return hashlib.sha256(f"{ENGINE_VERSION}|{signature}".encode()).hexdigest()[:12]
+
+
+def normalize(code: str) -> str:
+    # only newline style is normalized; anything else may change what the parser reports
+    return code.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def cache_key(code: str) -> str:
+    digest = hashlib.sha256(normalize(code).encode("utf-8", "surrogatepass")).hexdigest()
+    return f"analyze-code:{ruleset_version()}:{digest}"
+
+
+def _shared():
+    return caches[CACHE_ALIAS] if CACHE_ALIAS else None
+
+
+def _count(hit: bool) -> None:
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+
+
+def cache_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "size": len(_local)}
+
+
+def lookup(code: str) -> Tuple[str, Optional[List[dict]]]:
+    """Return ``(key, issues)``; ``issues`` is None on a miss in both cache layers."""
+    key = cache_key(code)
+    issues = _local.get(key)
+    if issues is None and _shared() is not None:
+        issues = _shared().get(key)
+        if issues is not None:
+            _local.set(key, issues)
+    return key, issues
+
+
+def store(key: str, issues: List[dict]) -> None:
+    _local.set(key, issues)
+    if _shared() is not None:
+        _shared().set(key, issues, CACHE_TIMEOUT)
+
+
+def analyze_cached(code: str, runner: Callable[[str], List[dict]] = analyze) -> Tuple[List[dict], bool]:
+    """Analyze ``code`` through the cache, calling ``runner`` on a miss; returns ``(issues, hit)``."""
+    key, issues = lookup(code)
+    hit = issues is not None
+    if not hit:
+        issues = runner(code)
+        store(key, issues)
+    _count(hit)
+    return issues, hit
@@ -0,0 +1,216 @@
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+
+from django.conf import settings
+
+from core.services.code_analysis import analyze
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+MAX_SOURCE_BYTES = getattr(settings, "ANALYZE_CODE_MAX_BYTES", 100_000)
+# 0 disables the pool and analyzes inline in the request thread
+WORKERS = getattr(settings, "ANALYZE_CODE_WORKERS", os.cpu_count() or 2)
+# jobs allowed to wait for a worker before new submissions are turned away
+QUEUE_SIZE = getattr(settings, "ANALYZE_CODE_QUEUE_SIZE", 4 * max(WORKERS, 1))
+JOB_TIMEOUT = getattr(settings, "ANALYZE_CODE_TIMEOUT", 2.0)
+# longest a job may wait for a free worker before the request gets a 503 instead
+QUEUE_TIMEOUT = getattr(settings, "ANALYZE_CODE_QUEUE_TIMEOUT", 5.0)
+# address-space headroom granted to each worker on top of what it inherits at fork
+MEMORY_LIMIT_MB = getattr(settings, "ANALYZE_CODE_MEMORY_MB", 256)
+
+
+class AnalysisError(Exception):
+    status_code = 503
+    retry_after = None
+
+
+class SourceTooLarge(AnalysisError):
+    status_code = 413
+
+
+class AnalysisRejected(AnalysisError):
+    """The submission hit the time, memory or nesting limits of a worker."""
+    status_code = 422
+
+
+class AnalysisBusy(AnalysisError):
+    status_code = 503
+    retry_after = 1
+
+
+class _JobTimeout(Exception):
+    pass
+
+
+def _current_vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+# Per queue slot, the job currently holding it and the wall-clock time a worker started running it.
+# Shared with the workers, so the parent can tell a job that is still queued from one that is stuck.
+_CAPACITY = max(WORKERS, 1) + QUEUE_SIZE
+_slot_job = multiprocessing.RawArray("q", _CAPACITY)
+_slot_started = multiprocessing.RawArray("d", _CAPACITY)
+
+
+def _worker_init(memory_limit_mb: int, slot_job=None, slot_started=None) -> None:
+    global _slot_job, _slot_started
+    if slot_job is not None:
+        _slot_job, _slot_started = slot_job, slot_started
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is None or not memory_limit_mb:
+        return
+    baseline = _current_vm_bytes()
+    if baseline:
+        limit = baseline + memory_limit_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+_alarm = {"fired": False, "armed": False}
+
+
+def _on_alarm(signum, frame):
+    # a signal already raised when the job disarmed the timer is delivered late; ignore it then
+    if not _alarm["armed"]:
+        return
+    _alarm["fired"] = True
+    raise _JobTimeout()
+
+
+def _analyze_job(code: str, timeout: float, slot: int = -1, job: int = 0):
+    """Runs inside a worker process; returns ``(outcome, issues)``."""
+    if slot >= 0:
+        _slot_job[slot] = job
+        _slot_started[slot] = time.time()
+    _alarm["fired"], _alarm["armed"] = False, True
+    # restored afterwards: the job may also run in a process that is not a pool worker (tests)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    # re-arms every 50ms: an alarm landing where exceptions are swallowed (a weakref finalizer,
+    # a __del__) would otherwise be lost and the job would run on until the parent recycles the pool
+    signal.setitimer(signal.ITIMER_REAL, timeout, 0.05)
+    try:
+        try:
+            return "ok", analyze(code)
+        finally:
+            # disarmed before any handler below runs, so a repeat alarm cannot escape from it
+            _alarm["armed"] = False
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except (MemoryError, RecursionError):
+        return "too-complex", None
+    except Exception:
+        # the alarm can surface as _JobTimeout or, when it lands inside ast.parse, as a SystemError
+        if _alarm["fired"]:
+            return "timeout", None
+        raise
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(_CAPACITY)
+_free_slots = list(range(_CAPACITY))
+_free_lock = threading.Lock()
+_job_ids = itertools.count(1)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=WORKERS, initializer=_worker_init,
+                initargs=(MEMORY_LIMIT_MB, _slot_job, _slot_started),
+            )
+        return _executor
+
+
+def _recycle(executor: ProcessPoolExecutor) -> None:
+    """Kill a pool whose worker is stuck (e.g. in a C-level parse) and let the next job start a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def check_source(code: str) -> None:
+    if len(code.encode("utf-8", "surrogatepass")) > MAX_SOURCE_BYTES:
+        raise SourceTooLarge(f"Code exceeds the {MAX_SOURCE_BYTES} byte analysis limit.")
+
+
+def _wait(executor: ProcessPoolExecutor, future, slot: int, job: int):
+    """
+    The job's result. The run deadline starts when a worker picks the job up, so time spent
+    queued behind other requests never counts against it: a job that only waited too long is
+    turned away with a 503, and the pool is recycled only when the worker running it is stuck.
+    """
+    queued_until = time.monotonic() + QUEUE_TIMEOUT
+    while True:
+        started = _slot_started[slot] if _slot_job[slot] == job else 0.0
+        if started:
+            # the worker's own alarm normally fires first; this covers a worker stuck in C code
+            remaining = started + JOB_TIMEOUT * 2 + 1 - time.time()
+        else:
+            remaining = queued_until - time.monotonic()
+        try:
+            return future.result(timeout=max(0.0, min(remaining, 0.1)))
+        except FutureTimeout:
+            if remaining > 0.1:
+                continue
+            if _slot_job[slot] == job and _slot_started[slot]:
+                if started:
+                    _recycle(executor)
+                    raise AnalysisRejected("Code analysis timed out.")
+                continue  # picked up just now; wait for it under the run deadline
+            future.cancel()
+            raise AnalysisBusy("Code analysis is busy; retry shortly.")
+
+
+def run_analysis(code: str) -> List[dict]:
+    """Analyze ``code`` in the worker pool, enforcing size, queue, time and memory limits."""
+    check_source(code)
+    if WORKERS <= 0:
+        return analyze(code)
+
+    if not _slots.acquire(blocking=False):
+        raise AnalysisBusy("Code analysis is busy; retry shortly.")
+    with _free_lock:
+        slot = _free_slots.pop()
+    job = next(_job_ids)
+    _slot_job[slot], _slot_started[slot] = 0, 0.0
+    try:
+        executor = _get_executor()
+        future = executor.submit(_analyze_job, code, JOB_TIMEOUT, slot, job)
+        try:
+            outcome, issues = _wait(executor, future, slot, job)
+        except BrokenProcessPool:
+            _recycle(executor)
+            raise AnalysisBusy("Code analysis worker restarted; retry shortly.")
+    finally:
+        with _free_lock:
+            _free_slots.append(slot)
+        _slots.release()
+
+    if outcome == "timeout":
+        raise AnalysisRejected("Code analysis timed out.")
+    if outcome == "too-complex":
+        raise AnalysisRejected("Code is too large or deeply nested to analyze.")
+    return issues
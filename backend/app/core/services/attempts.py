@@ -0,0 +1,19 @@
+from typing import List
+
+from core.models import Attempt
+
+ATTEMPT_UPSERT_FIELDS = ['timestamp', 'correctness', 'hints_used', 'duration_sec']
+
+
+def upsert_attempts(attempts: List[Attempt]) -> List[Attempt]:
+    """
+    INSERT ... ON CONFLICT (student_id, lesson_id) DO UPDATE as a single statement (per batch),
+    backed by the uniq_attempt_student_lesson constraint. Works on SQLite and Postgres, and
+    sets the primary key on each instance whether the row was inserted or updated.
+    """
+    return Attempt.objects.bulk_create(
+        attempts,
+        update_conflicts=True,
+        unique_fields=['student', 'lesson'],
+        update_fields=ATTEMPT_UPSERT_FIELDS,
+    )
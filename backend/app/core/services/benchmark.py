@@ -0,0 +1,260 @@
+import logging
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Attempt, Course, Student
+from users.services.auth import AuthService
+
+User = get_user_model()
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    # (ctx, iteration) -> (path, json body or None)
+    request: Callable[[dict, int], Tuple[str, Optional[dict]]]
+    auth: bool = True
+    after: Optional[Callable[[dict, object], None]] = None
+    # the ctx key holding the bearer token sent when ``auth`` is set
+    token: str = "access"
+    # writes rows (attempts, users, token records); skipped when benchmarking a real database
+    writes: bool = False
+
+
+def _get(path):
+    return lambda ctx, i: (path.format(**ctx), None)
+
+
+def _keep_refresh(ctx, response):
+    token = (response.json() or {}).get("refresh") if response.status_code == 200 else None
+    cookie = response.cookies.get("refresh_token")
+    ctx["refresh"] = cookie.value if cookie is not None and cookie.value else token or ctx["refresh"]
+
+
+def _attempt(ctx, i):
+    return "/api/attempts/", {
+        "lesson": ctx["lesson_id"], "timestamp": timezone.now().isoformat(),
+        "correctness": 0.5, "hints_used": i % 3, "duration_sec": 60,
+    }
+
+
+def _batch(ctx, i):
+    now = timezone.now().isoformat()
+    return "/api/attempts/batch/", {"attempts": [
+        {"lesson": lesson_id, "timestamp": now, "correctness": 0.75, "hints_used": 1, "duration_sec": 90}
+        for lesson_id in ctx["lesson_ids"]
+    ]}
+
+
+# every route in core/urls.py and users/urls.py (QueryBudgetTests checks the URL names are all here)
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("student-overview", "get", _get("/api/students/overview/")),
+    Endpoint("student-dashboard", "get", _get("/api/students/dashboard/")),
+    Endpoint("student-recommendation", "get", _get("/api/students/recommendation/")),
+    Endpoint("attempt-list", "get", _get("/api/attempts/")),
+    Endpoint("create-attempt", "post", _attempt, writes=True),
+    Endpoint("create-attempt-batch", "post", _batch, writes=True),
+    Endpoint("analyze-code", "post", lambda ctx, i: ("/api/analyze-code/", {
+        "code": f"def f(a, b):\n    try:\n        return a\n    except:\n        print({i})\n",
+    })),
+    Endpoint("course-list", "get", _get("/api/courses/")),
+    Endpoint("course-detail", "get", _get("/api/courses/{course_id}/")),
+    Endpoint("lesson-list", "get", _get("/api/lesson/{course_id}")),
+    Endpoint("metrics", "get", _get("/api/metrics/"), token="staff_access"),
+    Endpoint("auth-register", "post", lambda ctx, i: ("/api/user/register/", {
+        "full_name": "Bench User", "email": f"bench-{ctx['run']}-{i}@example.com", "password": "bench-pass-1",
+    }), auth=False, writes=True),
+    Endpoint("auth-login", "post", lambda ctx, i: ("/api/user/login/", {
+        "email": ctx["email"], "password": ctx["password"],
+    }), auth=False, writes=True),
+    Endpoint("auth-refresh", "post", lambda ctx, i: ("/api/user/refresh/", {"refresh": ctx["refresh"]}),
+             auth=False, after=_keep_refresh, writes=True),
+    Endpoint("auth-me", "get", _get("/api/user/me/")),
+    Endpoint("auth-logout", "post", lambda ctx, i: ("/api/user/logout/", None), writes=True),
+    Endpoint("auth-verify", "get", _get("/api/user/verify/")),
+    Endpoint("profile", "get", _get("/api/user/profile/")),
+]
+
+# Hard ceilings on queries per request. They do not depend on data volume, so an N+1 pattern
+# creeping back into a view shows up as a budget violation even on a tiny dataset.
+QUERY_BUDGETS: Dict[str, int] = {
+    "student-overview": 3,
+    "student-dashboard": 3,
+    "student-recommendation": 4,
+    "attempt-list": 2,
+    "create-attempt": 10,
+    "create-attempt-batch": 11,
+    "analyze-code": 1,
+    "course-list": 3,
+    "course-detail": 1,
+    "lesson-list": 1,
+    "metrics": 1,
+    "auth-register": 12,
+    "auth-login": 2,
+    "auth-refresh": 5,
+    "auth-me": 0,
+    "auth-logout": 5,
+    "auth-verify": 1,
+    "profile": 1,
+}
+
+
+def bench_context(password: str, read_only: bool = False) -> dict:
+    """
+    Pick the busiest seeded student and the ids the endpoint table needs. ``read_only`` mints a
+    bare access token, since issuing a refresh token records it in the token blacklist tables.
+    """
+    student = (
+        Student.objects.filter(user__isnull=False).select_related("user")
+        .order_by("-course_progress__attempt_count", "id").first()
+    )
+    if student is None:
+        raise ValueError("No student with a user account to benchmark with; seed some data first.")
+    attempt = Attempt.objects.filter(student=student).select_related("lesson").first()
+    course = attempt.lesson.course if attempt else Course.objects.order_by("id").first()
+    lesson_ids = list(course.lessons.order_by("order_index").values_list("id", flat=True)[:50])
+    if read_only:
+        access = AccessToken.for_user(student.user)
+        AuthService.add_profile_claims(access, student.user, student.id)
+        tokens = {"access": str(access), "refresh": None}
+    else:
+        tokens = AuthService.generate_jwt_tokens(student.user)
+    # staff-only routes (metrics) need a staff account; a real database is only read, never given one
+    staff = User.objects.filter(is_staff=True, is_active=True).order_by("id").first()
+    if staff is None and not read_only:
+        staff, _ = User.objects.get_or_create(username="bench-staff@example.com", defaults={"is_staff": True})
+    return {
+        "run": int(time.time()),
+        "email": student.user.username,
+        "password": password,
+        "access": tokens["access"],
+        "refresh": tokens["refresh"],
+        "staff_access": str(AccessToken.for_user(staff)) if staff else None,
+        "course_id": course.id,
+        "lesson_id": lesson_ids[0],
+        "lesson_ids": lesson_ids,
+    }
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _call(client: Client, endpoint: Endpoint, ctx: dict, i: int):
+    path, body = endpoint.request(ctx, i)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {ctx[endpoint.token]}"} if endpoint.auth else {}
+    if endpoint.method == "get":
+        response = client.get(path, **headers)
+    else:
+        response = client.post(path, body or {}, content_type="application/json", **headers)
+    if endpoint.after:
+        endpoint.after(ctx, response)
+    return response
+
+
+@contextmanager
+def capture_all_queries():
+    """Queries on every configured alias: reads routed to the replica count towards the budgets too."""
+    with ExitStack() as stack:
+        seen, captures = set(), []
+        for conn in connections.all():
+            if id(conn) not in seen:
+                seen.add(id(conn))
+                captures.append(stack.enter_context(CaptureQueriesContext(conn)))
+        yield captures
+
+
+def measure(endpoint: Endpoint, ctx: dict, iterations: int, client: Optional[Client] = None) -> dict:
+    """Latency percentiles, per-request query count (max) and peak traced memory for one endpoint."""
+    client = client or Client(raise_request_exception=False)
+    _call(client, endpoint, ctx, -1)  # warm caches, pools and lazy imports
+
+    latencies, queries, status = [], 0, None
+    for i in range(iterations):
+        with capture_all_queries() as captured:
+            started = time.perf_counter()
+            response = _call(client, endpoint, ctx, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, sum(len(c) for c in captured))
+        status = response.status_code
+
+    # memory is traced in a separate pass so tracemalloc overhead does not skew the timings
+    tracemalloc.start()
+    try:
+        _call(client, endpoint, ctx, iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": status,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(ctx: dict, iterations: int, only: Optional[List[str]] = None,
+                   read_only: bool = False) -> Dict[str, dict]:
+    """Measure every endpoint (or only ``only``); ``read_only`` skips the ones that write rows."""
+    results = {}
+    request_log = logging.getLogger("django.request")
+    level = request_log.level
+    # 5xx statuses land in the report; a traceback per iteration would only bury it
+    request_log.setLevel(logging.CRITICAL)
+    try:
+        # throttles would turn repeated writes into 429s; request throughput is what is being measured
+        with mock.patch.object(SimpleRateThrottle, "allow_request", return_value=True):
+            for endpoint in ENDPOINTS:
+                if (only and endpoint.name not in only) or (read_only and endpoint.writes):
+                    continue
+                if endpoint.auth and not ctx.get(endpoint.token):
+                    continue  # no staff account to call it with
+                results[endpoint.name] = measure(endpoint, ctx, iterations)
+    finally:
+        request_log.setLevel(level)
+    return results
+
+
+def budget_violations(results: Dict[str, dict], budgets: Dict[str, int] = QUERY_BUDGETS) -> List[str]:
+    return [
+        f"{name}: {r['queries']} queries (budget {budgets[name]})"
+        for name, r in results.items()
+        if name in budgets and r["queries"] > budgets[name]
+    ]
+
+
+def compare(baseline: Dict[str, dict], current: Dict[str, dict], latency_tolerance: float) -> Tuple[List[str], List[str]]:
+    """Return ``(lines, regressions)``; any query-count increase is a regression, latency beyond the tolerance too."""
+    lines, regressions = [], []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"{name}: new")
+            continue
+        lines.append(
+            f"{name}: p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms, "
+            f"queries {before['queries']} -> {now['queries']}, peak {before['peak_kb']} -> {now['peak_kb']} KiB"
+        )
+        if now["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {now['queries']}")
+        if latency_tolerance and now["p95_ms"] > before["p95_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+    return lines, regressions
@@ -0,0 +1,213 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import Course, Lesson, Tag
+from core.services.tags import normalize_tags
+
+CATALOG_CACHE_ALIAS = getattr(settings, "CATALOG_CACHE_ALIAS", "default")
+# bounds staleness (to about twice this) if a version bump is ever missed, e.g. queryset.update() bypassing signals
+CATALOG_CACHE_TTL = getattr(settings, "CATALOG_CACHE_TTL", 300)
+
+VERSION_KEY = "catalog:version"
+
+
+@dataclass(frozen=True)
+class LessonEntry:
+    id: int
+    course_id: int
+    title: str
+    tags: Tuple[str, ...]
+    order_index: int
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "title": self.title, "tags": list(self.tags), "order_index": self.order_index}
+
+
+@dataclass(frozen=True)
+class CourseEntry:
+    id: int
+    name: str
+    description: str
+    difficulty: int
+    lessons: Tuple[LessonEntry, ...]  # by order_index
+    tags: frozenset  # normalized (services.tags.normalize_tags), like Tag.name
+
+    @property
+    def first_lesson(self) -> Optional[LessonEntry]:
+        return self.lessons[0] if self.lessons else None
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Immutable snapshot of every course with its ordered lessons; safe to share between threads."""
+    version: int
+    courses: Tuple[CourseEntry, ...]  # by id
+    # Tag.id by normalized tag name (the index the per-student mastery vectors use)
+    tag_ids: Mapping[str, int] = field(default_factory=dict, compare=False)
+    built_at: float = field(default_factory=time.monotonic, compare=False)
+    by_id: Mapping[int, CourseEntry] = field(init=False, compare=False)
+    lessons_by_id: Mapping[int, LessonEntry] = field(init=False, compare=False)
+    # content hash; unlike ``version`` it is stable across processes and cache restarts
+    fingerprint: str = field(init=False, compare=False)
+    # normalized tag vocabulary and the read-only (courses, tags) boolean matrix, rows in ``courses`` order
+    tag_names: Tuple[str, ...] = field(init=False, compare=False)
+    tag_index: Mapping[str, int] = field(init=False, compare=False)
+    course_tags: np.ndarray = field(init=False, compare=False, repr=False)
+    tag_column_ids: np.ndarray = field(init=False, compare=False, repr=False)
+    lesson_tag_ids: Mapping[int, Tuple[int, ...]] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "by_id", MappingProxyType({c.id: c for c in self.courses}))
+        object.__setattr__(self, "lessons_by_id", MappingProxyType(
+            {l.id: l for c in self.courses for l in c.lessons}
+        ))
+        content = repr([(c.id, c.name, c.description, c.difficulty, c.lessons) for c in self.courses])
+        object.__setattr__(self, "fingerprint", hashlib.sha1(content.encode()).hexdigest())
+
+        tag_names = tuple(sorted({t for c in self.courses for t in c.tags}))
+        tag_index = {t: i for i, t in enumerate(tag_names)}
+        matrix = np.zeros((len(self.courses), len(tag_names)), dtype=bool)
+        for row, course in enumerate(self.courses):
+            matrix[row, [tag_index[t] for t in course.tags]] = True
+        matrix.setflags(write=False)
+        object.__setattr__(self, "tag_ids", MappingProxyType(dict(self.tag_ids)))
+        # per catalog tag (column) and per lesson, the Tag ids; 0 where a tag is not indexed yet
+        column_ids = np.array([self.tag_ids.get(n, 0) for n in tag_names], dtype=np.int64)
+        column_ids.setflags(write=False)
+        object.__setattr__(self, "tag_column_ids", column_ids)
+        object.__setattr__(self, "lesson_tag_ids", MappingProxyType({
+            l.id: tuple(self.tag_ids[n] for n in normalize_tags(l.tags) if n in self.tag_ids)
+            for c in self.courses for l in c.lessons
+        }))
+        object.__setattr__(self, "tag_names", tag_names)
+        object.__setattr__(self, "tag_index", MappingProxyType(tag_index))
+        object.__setattr__(self, "course_tags", matrix)
+
+    def __getstate__(self):
+        return {"version": self.version, "courses": self.courses, "tag_ids": dict(self.tag_ids)}
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "version", state["version"])
+        object.__setattr__(self, "courses", state["courses"])
+        object.__setattr__(self, "tag_ids", state.get("tag_ids", {}))
+        object.__setattr__(self, "built_at", time.monotonic())
+        self.__post_init__()
+
+    def tag_mask(self, tags: Iterable[str]) -> np.ndarray:
+        """Boolean row over ``tag_names`` for raw ``tags``; tags no course uses are ignored."""
+        mask = np.zeros(len(self.tag_names), dtype=bool)
+        mask[[self.tag_index[t] for t in normalize_tags(tags) if t in self.tag_index]] = True
+        return mask
+
+    def tag_values(self, vector: np.ndarray) -> np.ndarray:
+        """A per-Tag.id vector (e.g. mastery) gathered onto ``tag_names``; NaN where it has no value."""
+        values = np.full(len(self.tag_names), np.nan, dtype=np.float64)
+        ids = self.tag_column_ids
+        present = (ids > 0) & (ids <= len(vector))
+        values[present] = vector[ids[present] - 1]
+        return values
+
+    def course(self, course_id) -> Optional[CourseEntry]:
+        try:
+            return self.by_id.get(int(course_id))
+        except (TypeError, ValueError):
+            return None
+
+
+_local: Dict[str, Catalog] = {}
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def _fresh_version() -> int:
+    # time-based so a version re-created after cache eviction never matches an older snapshot
+    return time.time_ns() // 1000
+
+
+def catalog_version() -> int:
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _fresh_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """Invalidate every process's snapshot; called from the Course/Lesson signals."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _fresh_version(), None)
+
+
+def build_catalog(version: int) -> Catalog:
+    lessons_by_course: Dict[int, list] = {}
+    for lesson in Lesson.objects.order_by("course_id", "order_index", "id").only(
+            "id", "course_id", "title", "tags", "order_index"):
+        lessons_by_course.setdefault(lesson.course_id, []).append(LessonEntry(
+            id=lesson.id,
+            course_id=lesson.course_id,
+            title=lesson.title,
+            tags=tuple(lesson.tags or ()),
+            order_index=lesson.order_index,
+        ))
+
+    courses = []
+    for course in Course.objects.order_by("id"):
+        lessons = tuple(lessons_by_course.get(course.id, ()))
+        courses.append(CourseEntry(
+            id=course.id,
+            name=course.name,
+            description=course.description,
+            difficulty=course.difficulty,
+            lessons=lessons,
+            tags=frozenset(normalize_tags([t for l in lessons for t in l.tags])),
+        ))
+    return Catalog(version=version, courses=tuple(courses), tag_ids=dict(Tag.objects.values_list("name", "id")))
+
+
+def _usable(snapshot: Optional[Catalog], version: int) -> bool:
+    return (
+        snapshot is not None and snapshot.version == version
+        and time.monotonic() - snapshot.built_at < CATALOG_CACHE_TTL
+    )
+
+
+def get_catalog() -> Catalog:
+    """
+    Current catalog snapshot: process memory first, then the shared cache, then the database.
+    Costs one cache read (the version) when nothing has changed.
+    """
+    version = catalog_version()
+    snapshot = _local.get("catalog")
+    if _usable(snapshot, version):
+        return snapshot
+
+    with _lock:
+        snapshot = _local.get("catalog")
+        if _usable(snapshot, version):
+            return snapshot
+        key = f"catalog:snapshot:{version}"
+        snapshot = _cache().get(key)
+        if snapshot is None:
+            snapshot = build_catalog(version)
+            _cache().set(key, snapshot, CATALOG_CACHE_TTL)
+        _local["catalog"] = snapshot
+        return snapshot
+
+
+def clear_local_catalog() -> None:
+    _local.clear()
@@ -0,0 +1,127 @@
+import ast
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple, Type
+
+# bump when rule semantics change without the set of rule names changing
+ENGINE_VERSION = 1
+
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    severity: str
+    node_types: Tuple[Type[ast.AST], ...]
+    check: Callable[[ast.AST, "AnalysisContext"], Iterable[str]]
+    on_exit: bool = False  # run after the node's subtree has been visited
+
+
+RULES: List[Rule] = []
+
+
+def rule(name: str, severity: str, *node_types: Type[ast.AST], on_exit: bool = False):
+    """Register ``fn(node, ctx)`` as a rule; it yields one message per issue found on ``node``."""
+    def register(fn):
+        RULES.append(Rule(name, severity, node_types, fn, on_exit))
+        return fn
+    return register
+
+
+@dataclass
+class Scope:
+    node: ast.AST
+    # Load count of each argument name at scope entry; compared again on exit
+    marks: Dict[str, int]
+
+
+@dataclass
+class AnalysisContext:
+    loads: Counter = field(default_factory=Counter)
+    scopes: List[Scope] = field(default_factory=list)
+
+    @property
+    def scope(self) -> Scope:
+        return self.scopes[-1]
+
+    def used_in_scope(self, name: str) -> bool:
+        """True if ``name`` was read anywhere inside the current scope (nested scopes included)."""
+        return self.loads[name] != self.scope.marks.get(name, self.loads[name])
+
+
+def _arg_names(args: ast.arguments) -> List[str]:
+    names = [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs]
+    names += [a.arg for a in (args.vararg, args.kwarg) if a is not None]
+    return names
+
+
+def _dispatch(rules: List[Rule]):
+    enter, leave = {}, {}
+    for index, r in enumerate(rules):
+        table = leave if r.on_exit else enter
+        for t in r.node_types:
+            table.setdefault(t, []).append((index, r))
+    return enter, leave
+
+
+def analyze(code: str) -> List[dict]:
+    """Run every registered rule over ``code`` in a single, iterative AST traversal."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [{"rule": "syntax-error", "message": str(e), "severity": "error"}]
+
+    enter, leave = _dispatch(RULES)
+    ctx = AnalysisContext()
+    found = []
+
+    def run(hooks, node):
+        for index, r in hooks:
+            for message in r.check(node, ctx):
+                position = (index, getattr(node, "lineno", 0), getattr(node, "col_offset", 0))
+                found.append((position, {"rule": r.name, "message": message, "severity": r.severity}))
+
+    stack = [(tree, False)]
+    while stack:
+        node, leaving = stack.pop()
+        node_type = type(node)
+
+        if leaving:
+            run(leave.get(node_type, ()), node)
+            if isinstance(node, SCOPE_NODES):
+                ctx.scopes.pop()
+            continue
+
+        if node_type is ast.Name and isinstance(node.ctx, ast.Load):
+            ctx.loads[node.id] += 1
+        if isinstance(node, SCOPE_NODES):
+            ctx.scopes.append(Scope(node, {a: ctx.loads[a] for a in _arg_names(node.args)}))
+
+        run(enter.get(node_type, ()), node)
+        if node_type in leave or isinstance(node, SCOPE_NODES):
+            stack.append((node, True))
+        stack.extend((child, False) for child in reversed(list(ast.iter_child_nodes(node))))
+
+    # group by rule (registration order), then source position; the sort is stable for ties
+    found.sort(key=lambda item: item[0])
+    return [issue for _, issue in found]
+
+
+@rule("unused-arg", "info", ast.FunctionDef, on_exit=True)
+def unused_arg(node, ctx):
+    for a in node.args.args:
+        if not ctx.used_in_scope(a.arg):
+            yield f'Function arg "{a.arg}" appears unused.'
+
+
+@rule("bare-except", "warn", ast.ExceptHandler)
+def bare_except(node, ctx):
+    if node.type is None:
+        yield "Avoid bare except; catch specific exceptions."
+
+
+@rule("print-call", "info", ast.Call)
+def print_call(node, ctx):
+    if getattr(getattr(node, "func", None), "id", None) == "print":
+        yield "Avoid print statements; use logging instead."
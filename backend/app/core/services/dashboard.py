@@ -0,0 +1,193 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+
+from core.models import AttemptDailyRollup, Student, StudentCourseProgress
+from core.services.catalog import Catalog
+from core.services.mastery import mastery_by_tag, mastery_vector
+from core.services.rollups import latest_rollups
+from core.services.recommender import (
+    FEATURE_COLUMNS, feature_dict, hint_rate, recency_gap_days, score_batch, tag_gaps, to_confidence,
+)
+
+# Payload builders shared by the per-section views and the aggregated dashboard endpoint. Loaders hit
+# the database; builders are pure functions of what the loaders (and the catalog snapshot) return.
+
+SECTIONS = ("overview", "recommendation", "courses")
+# run the dashboard's loaders on separate threads (and connections); pointless on sqlite, which serializes
+CONCURRENT_LOADS = getattr(
+    settings, "DASHBOARD_CONCURRENT_LOADS", "sqlite" not in settings.DATABASES["default"]["ENGINE"],
+)
+
+
+def isolated(fn):
+    """Wrap a loader for a worker thread: drop the thread's connection afterwards unless it may persist."""
+    def run(*args):
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+    return run
+
+
+def load_progress(student_id: int) -> Dict[int, StudentCourseProgress]:
+    return {p.course_id: p for p in StudentCourseProgress.objects.filter(student_id=student_id)}
+
+
+def load_latest_rollups(student_id: int) -> Dict[int, AttemptDailyRollup]:
+    """Newest daily rollup per attempted lesson: O(lessons) rows however many attempts the student made."""
+    return {r.lesson_id: r for r in latest_rollups(student_id)}
+
+
+def _next_lesson(catalog: Catalog, course, row: Optional[StudentCourseProgress]):
+    """The maintained pointer (None once every lesson is mastered); the first lesson before any attempt."""
+    if row is None:
+        return course.first_lesson
+    return catalog.lessons_by_id.get(row.next_lesson_id) if row.next_lesson_id else None
+
+
+def overview_payload(student: Student, catalog: Catalog, progress_by_course: Dict[int, StudentCourseProgress]) -> dict:
+    data = []
+    for course in catalog.courses:
+        row = progress_by_course.get(course.id)
+        progress = row.progress if row else 0
+        last_activity = row.last_activity.isoformat() if row and row.last_activity else None
+        next_lesson = _next_lesson(catalog, course, row)
+        next_up = next_lesson.title if next_lesson else None
+
+        data.append({
+            'id': course.id,
+            'name': course.name,
+            'description': course.description,
+            'difficulty': course.difficulty,
+            'progress': progress,
+            'last_activity': last_activity,
+            'next_up': next_up,
+        })
+
+    return {
+        'student': {
+            'id': student.id,
+            'name': student.name,
+            'email': student.email,
+        },
+        'courses': data,
+        # per-tag mastery (0..1) for the tags the student has attempted
+        'mastery': mastery_by_tag(catalog, mastery_vector(student)),
+    }
+
+
+def recommendation_payload(
+    catalog: Catalog, rows: Dict[int, StudentCourseProgress], now: datetime, mastery: Optional[np.ndarray] = None,
+) -> Optional[dict]:
+    """
+    Top course plus alternatives, or None when there is nothing to recommend. With the student's
+    ``mastery`` vector, tag gaps weigh each tag by mastery instead of counting it covered once attempted.
+    """
+    courses = catalog.courses
+    if not courses:
+        return None
+
+    # features come straight from the per-(student, course) feature store; tag gaps are one vectorized
+    # comparison of the student's coverage against the catalog's course x tag matrix
+    features = np.empty((len(courses), len(FEATURE_COLUMNS)), dtype=np.float64)
+    if mastery is not None and len(mastery):
+        # one row shared by every course: mastery is per tag, not per course
+        covered = np.nan_to_num(catalog.tag_values(mastery), nan=0.0)
+    else:
+        covered = np.zeros(catalog.course_tags.shape, dtype=bool)
+    for i, course in enumerate(courses):
+        row = rows.get(course.id)
+        if covered.ndim == 2 and row and row.covered_tags:
+            covered[i] = catalog.tag_mask(row.covered_tags)
+        features[i] = (
+            row.progress if row else 0,
+            recency_gap_days(row.last_activity if row else None, now),
+            0.0,
+            hint_rate(row.hint_sum, row.hint_count) if row else 0.0,
+        )
+    features[:, FEATURE_COLUMNS.index('tag_gap')] = tag_gaps(catalog.course_tags, covered)
+
+    batch = score_batch(features, k=3)
+    ranked = [courses[i] for i in batch.top_k]
+    best = int(batch.top_k[0])
+
+    def title(course):
+        lesson = _next_lesson(catalog, course, rows.get(course.id))
+        return f'Continue "{course.name}" — {lesson.title}' if lesson else f'Review "{course.name}"'
+
+    return {
+        'recommendation': {'id': str(ranked[0].id), 'title': title(ranked[0])},
+        'confidence': to_confidence(float(batch.scores[best])),
+        'reason_features': feature_dict(features[best]),
+        'alternatives': [{'id': str(c.id), 'title': title(c)} for c in ranked[1:]],
+    }
+
+
+def course_list_payload(catalog: Catalog, latest_rollup_by_lesson: Dict[int, AttemptDailyRollup]) -> list:
+    payload = []
+    for c in catalog.courses:
+        lessons = c.lessons
+        lesson_list = []
+        for l in lessons:
+            last = latest_rollup_by_lesson.get(l.id)
+            last_attempt = None
+            if last:
+                last_attempt = {
+                    "id": last.last_attempt_id,
+                    "timestamp": last.last_timestamp.isoformat(),
+                    "correctness": last.last_correctness,
+                    "hints_used": last.last_hints_used,
+                    "duration_sec": last.last_duration_sec,
+                    "progress": None,
+                }
+
+            lesson_list.append({
+                "id": l.id,
+                "title": l.title,
+                "order_index": l.order_index,
+                "tags": list(l.tags),
+                "latest_attempt": last_attempt,
+            })
+
+        # compute course-level progress as average of latest correctness per lesson (0..100)
+        total_lessons = len(lessons)
+        if total_lessons == 0:
+            progress = 0
+        else:
+            sum_correctness = 0.0
+            for l in lessons:
+                a = latest_rollup_by_lesson.get(l.id)
+                if a and a.last_correctness is not None:
+                    try:
+                        val = float(a.last_correctness)
+                    except (TypeError, ValueError):
+                        val = 0.0
+                    val = max(0.0, min(1.0, val))
+                    sum_correctness += val
+                else:
+                    sum_correctness += 0.0
+            progress = int((sum_correctness / total_lessons) * 100)
+
+        # last activity for the course is the most recent attempt timestamp among its lessons
+        timestamps = [
+            latest_rollup_by_lesson[l.id].last_timestamp
+            for l in lessons
+            if l.id in latest_rollup_by_lesson
+        ]
+        course_last_activity = max(timestamps).isoformat() if timestamps else None
+
+        payload.append({
+            "id": c.id,
+            "name": c.name,
+            "description": c.description,
+            "difficulty": c.difficulty,
+            "progress": progress,
+            "last_activity": course_last_activity,
+            "lessons": lesson_list,
+        })
+    return payload
@@ -0,0 +1,152 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Attempt, AttemptDailyRollup, LessonTag, Student, StudentMastery
+from core.services.catalog import Catalog
+from core.services.recommender import MAX_HINTS
+
+# weight of the newest attempt in each tag's moving average
+MASTERY_ALPHA = getattr(settings, "MASTERY_ALPHA", 0.3)
+# share of an attempt's score lost when the student used MAX_HINTS hints or more
+MASTERY_HINT_PENALTY = getattr(settings, "MASTERY_HINT_PENALTY", 0.5)
+
+_DTYPE = np.dtype("<f4")
+
+
+def pack(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=_DTYPE).tobytes()
+
+
+def unpack(blob) -> np.ndarray:
+    """The stored vector as a writable float32 array (empty for a student without attempts)."""
+    return np.frombuffer(bytes(blob or b""), dtype=_DTYPE).copy()
+
+
+def mastery_vector(student: Student) -> Optional[np.ndarray]:
+    """The student's vector when ``student.mastery`` is loaded or exists, else None. No query after select_related."""
+    try:
+        return unpack(student.mastery.vector)
+    except StudentMastery.DoesNotExist:
+        return None
+
+
+def attempt_score(correctness: float, hints_used: float) -> float:
+    """Correctness clamped to 0..1, discounted for hints (linearly up to MAX_HINTS)."""
+    correctness = min(1.0, max(0.0, float(correctness)))
+    hints = min(float(hints_used), MAX_HINTS) / MAX_HINTS
+    return correctness * (1.0 - MASTERY_HINT_PENALTY * hints)
+
+
+def apply(vector: np.ndarray, tag_ids: Iterable[int], score: float, count: int = 1) -> np.ndarray:
+    """
+    Fold ``count`` observations of ``score`` into the entries of ``tag_ids``: O(tags in the lesson).
+    An unseen tag (NaN) starts at the score. Returns the vector, grown when a tag id lies past its end.
+    """
+    index = np.fromiter((t - 1 for t in tag_ids), dtype=np.int64)
+    if not len(index):
+        return vector
+    if index.max() >= len(vector):
+        vector = np.concatenate([vector, np.full(index.max() + 1 - len(vector), np.nan, dtype=_DTYPE)])
+    keep = (1.0 - MASTERY_ALPHA) ** count
+    current = vector[index]
+    vector[index] = np.where(np.isnan(current), score, current * keep + score * (1.0 - keep))
+    return vector
+
+
+def lesson_tag_ids(lesson_ids: Iterable[int], catalog: Catalog) -> Dict[int, Tuple[int, ...]]:
+    """Tag ids per lesson from the catalog snapshot; lessons (or tags) newer than the snapshot are read from LessonTag."""
+    found, missing = {}, []
+    for lesson_id in set(lesson_ids):
+        if lesson_id in catalog.lesson_tag_ids:
+            found[lesson_id] = catalog.lesson_tag_ids[lesson_id]
+        else:
+            missing.append(lesson_id)
+    if missing:
+        extra: Dict[int, List[int]] = {lesson_id: [] for lesson_id in missing}
+        for lesson_id, tag_id in LessonTag.objects.filter(lesson_id__in=missing).values_list("lesson_id", "tag_id"):
+            extra[lesson_id].append(tag_id)
+        found.update((lesson_id, tuple(ids)) for lesson_id, ids in extra.items())
+    return found
+
+
+def record_mastery(student_id: int, attempts: Iterable[Attempt], catalog: Catalog) -> np.ndarray:
+    """
+    Write-path hook: fold freshly written attempts into the student's mastery vector. The row is
+    read with ``select_for_update`` so concurrent writers for one student apply in turn; it joins
+    the caller's transaction when there is one. Two queries (a third when the snapshot lacks a lesson).
+    """
+    attempts = list(attempts)
+    tags = lesson_tag_ids((a.lesson_id for a in attempts), catalog)
+    with transaction.atomic(savepoint=False):
+        row = StudentMastery.objects.select_for_update().filter(student_id=student_id).first()
+        vector = unpack(row.vector) if row else np.empty(0, dtype=_DTYPE)
+        for a in sorted(attempts, key=lambda a: a.timestamp):
+            vector = apply(vector, tags.get(a.lesson_id, ()), attempt_score(a.correctness, a.hints_used))
+        if row is None:
+            # first attempt of a new student: an upsert, in case a concurrent request created the row meanwhile
+            StudentMastery.objects.bulk_create(
+                [StudentMastery(student_id=student_id, vector=pack(vector))],
+                update_conflicts=True, unique_fields=["student"], update_fields=["vector", "updated_at"],
+            )
+        else:
+            row.vector = pack(vector)
+            row.save(update_fields=["vector", "updated_at"])
+    return vector
+
+
+def rebuild_mastery(student_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> Iterator[int]:
+    """
+    Recompute vectors from the daily rollups, oldest day first, one transaction per chunk of
+    ``batch_size`` students; yields the vectors written per chunk. A rollup counts as
+    ``attempt_count`` attempts at its mean score, so this matches the write path up to the
+    ordering of attempts within a day.
+    """
+    if student_ids is None:
+        student_ids = Student.objects.order_by("id").values_list("id", flat=True)
+    ids = list(student_ids)
+    index: Dict[int, List[int]] = {}
+    for lesson_id, tag_id in LessonTag.objects.values_list("lesson_id", "tag_id").iterator():
+        index.setdefault(lesson_id, []).append(tag_id - 1)
+    width = max((i for positions in index.values() for i in positions), default=-1) + 1
+    keep_by_count: Dict[int, float] = {}
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        # the same fold as ``apply``, on plain float lists: a rollup touches one to three tags, far
+        # too few for numpy's per-call overhead to pay off over a million rows
+        vectors: Dict[int, List[float]] = {}
+        for student_id, lesson_id, count, correctness_sum, hints_sum in (
+                AttemptDailyRollup.objects.filter(student_id__in=chunk, attempt_count__gt=0)
+                .order_by("student_id", "day", "last_timestamp")
+                .values_list("student_id", "lesson_id", "attempt_count", "correctness_sum", "hints_sum")
+                .iterator(chunk_size=10000)):
+            vector = vectors.get(student_id)
+            if vector is None:
+                vector = vectors[student_id] = [np.nan] * width
+            score = attempt_score(correctness_sum / count, hints_sum / count)
+            keep = keep_by_count.get(count)
+            if keep is None:
+                keep = keep_by_count[count] = (1.0 - MASTERY_ALPHA) ** count
+            for t in index.get(lesson_id, ()):
+                current = vector[t]
+                vector[t] = score if current != current else current * keep + score * (1.0 - keep)
+        with transaction.atomic():
+            StudentMastery.objects.filter(student_id__in=chunk).delete()
+            StudentMastery.objects.bulk_create(
+                [StudentMastery(student_id=s, vector=pack(v)) for s, v in vectors.items()], batch_size=batch_size,
+            )
+        yield len(vectors)
+
+
+def load_mastery(student_ids: Iterable[int]) -> Dict[int, np.ndarray]:
+    return {s: unpack(v) for s, v in StudentMastery.objects.filter(student_id__in=student_ids).values_list("student_id", "vector")}
+
+
+def mastery_by_tag(catalog: Catalog, vector: Optional[np.ndarray]) -> Dict[str, float]:
+    """``{tag: mastery}`` over the catalog's tags the student has attempted, for the overview."""
+    if vector is None or not len(vector):
+        return {}
+    values = catalog.tag_values(vector)
+    return {name: round(float(v), 3) for name, v in zip(catalog.tag_names, values) if not np.isnan(v)}
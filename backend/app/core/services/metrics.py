@@ -0,0 +1,130 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from core.services.analysis_cache import cache_stats
+
+# upper bounds (le) per histogram; +Inf is implicit
+SECONDS_BUCKETS = getattr(
+    settings, "PERF_METRICS_SECONDS_BUCKETS", (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect plus three additions under a lock."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[Tuple[str, int]], float, int]:
+        """Cumulative ``(le, count)`` pairs, sum and count, as Prometheus expects them."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative.append(("+Inf" if bound == float("inf") else _number(bound), running))
+        return cumulative, total, count
+
+
+# name -> (help, buckets, label name)
+METRICS = {
+    "http_request_duration_seconds": ("Wall time per request, by URL name.", SECONDS_BUCKETS, "route"),
+    "http_request_db_queries": ("Database queries per request, by URL name.", QUERY_BUCKETS, "route"),
+    "http_request_db_seconds": ("Time spent in database queries per request, by URL name.", SECONDS_BUCKETS, "route"),
+    "http_response_size_bytes": ("Response body size (non-streaming responses), by URL name.", BYTES_BUCKETS, "route"),
+    "auth_token_refresh_seconds": ("Refresh-token exchange latency, by outcome.", SECONDS_BUCKETS, "outcome"),
+}
+
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+_responses: Dict[Tuple[str, str], int] = {}
+_registry_lock = threading.Lock()
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def observe(metric: str, label: str, value: float) -> None:
+    """Add ``value`` to the histogram of ``metric`` (a key of METRICS) for one label value."""
+    key = (metric, label)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(key, Histogram(METRICS[metric][1]))
+    histogram.observe(value)
+
+
+def record_request(route: str, status: int, duration: float, queries: int, db_time: float, size=None) -> None:
+    observe("http_request_duration_seconds", route, duration)
+    observe("http_request_db_queries", route, queries)
+    observe("http_request_db_seconds", route, db_time)
+    if size is not None:
+        observe("http_response_size_bytes", route, size)
+    key = (route, f"{status // 100}xx")
+    with _registry_lock:
+        _responses[key] = _responses.get(key, 0) + 1
+
+
+def reset() -> None:
+    with _registry_lock:
+        _histograms.clear()
+        _responses.clear()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """All metrics of this process in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+        responses = sorted(_responses.items())
+
+    lines += ["# HELP http_responses_total Responses by URL name and status class.",
+              "# TYPE http_responses_total counter"]
+    for (route, status_class), n in responses:
+        lines.append(f'http_responses_total{{route="{_label(route)}",status="{status_class}"}} {n}')
+
+    for metric, (help_text, _, label_name) in METRICS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for (name, label), histogram in histograms:
+            if name != metric:
+                continue
+            buckets, total, count = histogram.snapshot()
+            labels = f'{label_name}="{_label(label)}"'
+            for le, n in buckets:
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f"{metric}_sum{{{labels}}} {_number(float(total))}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+
+    stats = cache_stats()
+    lines += [
+        "# HELP analyze_code_cache_hits_total Code analysis cache hits.",
+        "# TYPE analyze_code_cache_hits_total counter",
+        f"analyze_code_cache_hits_total {stats['hits']}",
+        "# HELP analyze_code_cache_misses_total Code analysis cache misses.",
+        "# TYPE analyze_code_cache_misses_total counter",
+        f"analyze_code_cache_misses_total {stats['misses']}",
+        "# HELP analyze_code_cache_entries Entries in the per-process code analysis cache.",
+        "# TYPE analyze_code_cache_entries gauge",
+        f"analyze_code_cache_entries {stats['size']}",
+    ]
+    return "\n".join(lines) + "\n"
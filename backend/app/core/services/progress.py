@@ -0,0 +1,261 @@
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from core.models import Attempt, AttemptDailyRollup, Lesson, StudentCourseProgress
+from core.services.tags import normalize_tags
+
+# a lesson counts as mastered once the student's latest attempt on it scores at least this
+LESSON_MASTERY_THRESHOLD = getattr(settings, "LESSON_MASTERY_THRESHOLD", 0.8)
+
+PROGRESS_UPDATE_FIELDS = [
+    'attempt_count', 'progress', 'last_activity', 'next_lesson', 'hint_sum', 'hint_count', 'covered_tags', 'updated_at',
+]
+
+
+def progress_from_count(attempt_count: int) -> int:
+    return min(100, attempt_count * 10)
+
+
+def next_lesson_id(lesson_ids: Sequence[int], correctness: Dict[int, float]) -> Optional[int]:
+    """
+    The first of ``lesson_ids`` (in course order) that is not mastered, given the latest
+    correctness per attempted lesson; None when every lesson is mastered.
+    """
+    for lesson_id in lesson_ids:
+        score = correctness.get(lesson_id)
+        if score is None or score < LESSON_MASTERY_THRESHOLD:
+            return lesson_id
+    return None
+
+
+def _tag_union(tag_lists) -> list:
+    return normalize_tags([t for tags in tag_lists for t in (tags or [])])
+
+
+def _upsert(rows):
+    StudentCourseProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['student', 'course'],
+        update_fields=PROGRESS_UPDATE_FIELDS,
+    )
+
+
+def refresh_progress(student_id: int, course_ids: Iterable[int]) -> List[StudentCourseProgress]:
+    """
+    Recompute the student's rows for ``course_ids`` from their newest daily rollup per lesson
+    (one query) and upsert them. Rollups outlive archived raw attempts, so progress does too.
+    The same pass advances ``next_lesson`` to the first lesson not yet mastered.
+    """
+    newest = AttemptDailyRollup.objects.filter(student_id=student_id, lesson_id=OuterRef('pk')).order_by('-day')
+    lessons_by_course = {course_id: [] for course_id in course_ids}
+    lessons = (
+        Lesson.objects.filter(course_id__in=lessons_by_course)
+        .order_by('course_id', 'order_index', 'id')
+        .annotate(
+            last_attempt=Subquery(newest.values('last_timestamp')[:1]),
+            hints=Subquery(newest.values('last_hints_used')[:1]),
+            correctness=Subquery(newest.values('last_correctness')[:1]),
+        )
+    )
+    for lesson in lessons:
+        lessons_by_course[lesson.course_id].append(lesson)
+
+    rows = []
+    for course_id, course_lessons in lessons_by_course.items():
+        attempted = [l for l in course_lessons if l.last_attempt is not None]
+        # one latest attempt per lesson, as in the raw Attempt table
+        attempt_count = len(attempted)
+        timestamps = [l.last_attempt for l in attempted]
+        rows.append(StudentCourseProgress(
+            student_id=student_id,
+            course_id=course_id,
+            attempt_count=attempt_count,
+            progress=progress_from_count(attempt_count),
+            last_activity=max(timestamps) if timestamps else None,
+            next_lesson_id=next_lesson_id(
+                [l.id for l in course_lessons], {l.id: l.correctness for l in attempted},
+            ),
+            hint_sum=sum(l.hints or 0 for l in attempted),
+            hint_count=attempt_count,
+            covered_tags=_tag_union(l.tags for l in attempted),
+        ))
+    if rows:
+        _upsert(rows)
+    return rows
+
+
+def refresh_course_progress(student_id: int, course_id: int) -> StudentCourseProgress:
+    return refresh_progress(student_id, [course_id])[0]
+
+
+def record_attempt(attempt: Attempt) -> StudentCourseProgress:
+    """Write-path hook: keep the derived progress row in step with a freshly saved attempt."""
+    return refresh_course_progress(attempt.student_id, attempt.lesson.course_id)
+
+
+def record_attempts(student_id: int, course_ids: Iterable[int]) -> List[StudentCourseProgress]:
+    """Batch write-path hook: one aggregate and one upsert for every course touched by the batch."""
+    return refresh_progress(student_id, set(course_ids))
+
+
+def _lesson_order(course_ids: Optional[Iterable[int]] = None):
+    """Lesson ids per course in course order, plus tags and course per lesson."""
+    lessons = Lesson.objects.order_by('course_id', 'order_index', 'id')
+    if course_ids is not None:
+        lessons = lessons.filter(course_id__in=list(course_ids))
+    course_lessons: Dict[int, List[int]] = {}
+    lesson_tags = {}
+    lesson_course = {}
+    for course_id, lesson_id, tags in lessons.values_list('course_id', 'id', 'tags'):
+        course_lessons.setdefault(course_id, []).append(lesson_id)
+        lesson_tags[lesson_id] = tags
+        lesson_course[lesson_id] = course_id
+    return course_lessons, lesson_tags, lesson_course
+
+
+def _insert_progress(rows: List[StudentCourseProgress], batch_size: int) -> None:
+    """
+    Insert new progress rows as plain parameter tuples through executemany: bulk_create on
+    sqlite splits into ~90-row statements and prepares every value field by field, which
+    dominates a rebuild of a large table.
+    """
+    ops = connection.ops
+    columns = ['student_id', 'course_id', 'attempt_count', 'progress', 'last_activity', 'next_lesson_id',
+               'hint_sum', 'hint_count', 'covered_tags', 'updated_at']
+    sql = (
+        f"INSERT INTO {ops.quote_name(StudentCourseProgress._meta.db_table)} "
+        f"({', '.join(ops.quote_name(c) for c in columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    updated_at = ops.adapt_datetimefield_value(timezone.now())
+    params = [
+        (r.student_id, r.course_id, r.attempt_count, r.progress, ops.adapt_datetimefield_value(r.last_activity),
+         r.next_lesson_id, r.hint_sum, r.hint_count, ops.adapt_json_value(r.covered_tags, None), updated_at)
+        for r in rows
+    ]
+    with connection.cursor() as cursor:
+        for i in range(0, len(params), batch_size):
+            cursor.executemany(sql, params[i:i + batch_size])
+
+
+def rebuild_progress(student_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Rebuild progress rows from the daily rollups (all students, or only ``student_ids``)."""
+    rollups = AttemptDailyRollup.objects.all()
+    existing = StudentCourseProgress.objects.all()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        rollups = rollups.filter(student_id__in=student_ids)
+        existing = existing.filter(student_id__in=student_ids)
+
+    course_lessons, lesson_tags, lesson_course = _lesson_order()
+
+    # newest rollup per (student, lesson): day-ordered, so the last one seen wins
+    latest = {}
+    for student_id, lesson_id, hints, correctness in (
+            rollups.order_by('student_id', 'lesson_id', 'day')
+            .values_list('student_id', 'lesson_id', 'last_hints_used', 'last_correctness')
+            .iterator(chunk_size=10000)):
+        latest[(student_id, lesson_id)] = (hints, correctness)
+
+    rows = {}
+    correctness_by_row = {}
+    for (student_id, lesson_id), (hints, correctness) in latest.items():
+        key = (student_id, lesson_course[lesson_id])
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = StudentCourseProgress(
+                student_id=key[0], course_id=key[1], covered_tags=[], attempt_count=0, hint_sum=0,
+            )
+            correctness_by_row[key] = {}
+        row.attempt_count += 1
+        row.hint_sum += hints
+        row.covered_tags.extend(lesson_tags.get(lesson_id) or [])
+        correctness_by_row[key][lesson_id] = correctness
+
+    # last activity aggregated in SQL: one datetime per progress row instead of one per rollup
+    for student_id, course_id, last in (
+            rollups.values('student_id', 'lesson__course_id').annotate(last=Max('last_timestamp'))
+            .order_by().values_list('student_id', 'lesson__course_id', 'last').iterator(chunk_size=10000)):
+        if (student_id, course_id) in rows:
+            rows[(student_id, course_id)].last_activity = last
+
+    for key, row in rows.items():
+        row.progress = progress_from_count(row.attempt_count)
+        row.hint_count = row.attempt_count
+        row.covered_tags = _tag_union([row.covered_tags])
+        row.next_lesson_id = next_lesson_id(course_lessons.get(row.course_id, ()), correctness_by_row[key])
+    rows = list(rows.values())
+
+    with transaction.atomic():
+        existing.delete()
+        _insert_progress(rows, batch_size)
+    return len(rows)
+
+
+def refresh_next_lessons(course_ids: Iterable[int], batch_size: int = 1000) -> int:
+    """
+    Recompute ``next_lesson`` for every progress row of ``course_ids`` after their lessons were
+    added, removed or reordered; returns the rows whose pointer moved. Reads the courses' newest
+    rollup per (student, lesson) once and writes only the changed rows.
+    """
+    course_ids = list(course_ids)
+    course_lessons, _, _ = _lesson_order(course_ids)
+    correctness: Dict[tuple, Dict[int, float]] = {}
+    for student_id, course_id, lesson_id, score in (
+            AttemptDailyRollup.objects.filter(lesson__course_id__in=course_ids)
+            .order_by('student_id', 'lesson_id', 'day')
+            .values_list('student_id', 'lesson__course_id', 'lesson_id', 'last_correctness')
+            .iterator(chunk_size=10000)):
+        correctness.setdefault((student_id, course_id), {})[lesson_id] = score
+
+    changed = []
+    for row in StudentCourseProgress.objects.filter(course_id__in=course_ids).only(
+            'id', 'student_id', 'course_id', 'next_lesson').iterator(chunk_size=batch_size):
+        pointer = next_lesson_id(
+            course_lessons.get(row.course_id, ()), correctness.get((row.student_id, row.course_id), {}),
+        )
+        if pointer != row.next_lesson_id:
+            row.next_lesson_id = pointer
+            changed.append(row)
+    StudentCourseProgress.objects.bulk_update(changed, ['next_lesson'], batch_size=batch_size)
+    return len(changed)
+
+
+class _NextLessonRefresh:
+    """on_commit callback: one ``refresh_next_lessons`` for every course collected in a transaction."""
+
+    def __init__(self):
+        self.course_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        refresh_next_lessons(sorted(self.course_ids))
+
+
+# this thread's queued callback, held weakly: Django drops the callbacks of a rolled-back
+# transaction or savepoint, and with its last reference gone the next change queues a new one
+_queued = threading.local()
+
+
+def refresh_next_lessons_on_commit(course_ids: Iterable[int]) -> None:
+    """
+    Queue ``refresh_next_lessons`` for after the current transaction commits, once per transaction
+    however many lessons of a course change (e.g. every lesson of a deleted course). Runs at once
+    outside a transaction.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        refresh_next_lessons(course_ids)
+        return
+    pending = _queued.callback() if getattr(_queued, "callback", None) else None
+    if pending is None or pending.done:
+        pending = _NextLessonRefresh()
+        _queued.callback = weakref.ref(pending)
+        transaction.on_commit(pending)
+    pending.course_ids.update(course_ids)
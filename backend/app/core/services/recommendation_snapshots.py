@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from core.models import RecommendationSnapshot, StudentCourseProgress, StudentMastery
+from core.services.catalog import Catalog
+from core.services.dashboard import recommendation_payload
+from core.services.mastery import load_mastery
+
+SNAPSHOT_MAX_AGE = timedelta(seconds=getattr(settings, "RECOMMENDATION_SNAPSHOT_MAX_AGE", 24 * 60 * 60))
+
+SNAPSHOT_UPDATE_FIELDS = ["payload", "catalog_fingerprint", "computed_at"]
+
+
+def fresh_snapshot(student_id: int, catalog: Catalog, now: Optional[datetime] = None) -> Optional[dict]:
+    """The stored payload if it is still valid for ``student_id``, else None. One query."""
+    now = now or timezone.now()
+    last_progress = (
+        StudentCourseProgress.objects.filter(student_id=OuterRef("student_id"))
+        .order_by("-updated_at").values("updated_at")[:1]
+    )
+    mastery_updated = StudentMastery.objects.filter(student_id=OuterRef("student_id")).values("updated_at")[:1]
+    snapshot = (
+        RecommendationSnapshot.objects.filter(student_id=student_id)
+        .annotate(last_progress=Subquery(last_progress), mastery_updated=Subquery(mastery_updated))
+        .first()
+    )
+    if snapshot is None:
+        return None
+    if snapshot.catalog_fingerprint != catalog.fingerprint or now - snapshot.computed_at > SNAPSHOT_MAX_AGE:
+        return None
+    # recency counts calendar days, so a snapshot from before midnight ranks with yesterday's gaps
+    if timezone.localdate(snapshot.computed_at) != timezone.localdate(now):
+        return None
+    # any attempt written (or mastery rebuilt) since the snapshot was computed invalidates it
+    for changed in (snapshot.last_progress, snapshot.mastery_updated):
+        if changed is not None and changed > snapshot.computed_at:
+            return None
+    return snapshot.payload
+
+
+def compute_snapshots(student_ids: List[int], catalog: Catalog, now: Optional[datetime] = None) -> int:
+    """Compute and upsert snapshots for one chunk of students: two reads and one write."""
+    now = now or timezone.now()
+    rows_by_student = {student_id: {} for student_id in student_ids}
+    for row in StudentCourseProgress.objects.filter(student_id__in=student_ids):
+        rows_by_student[row.student_id][row.course_id] = row
+    mastery = load_mastery(student_ids)
+
+    snapshots = []
+    for student_id, rows in rows_by_student.items():
+        payload = recommendation_payload(catalog, rows, now, mastery.get(student_id))
+        if payload is None:
+            continue
+        snapshots.append(RecommendationSnapshot(
+            student_id=student_id, payload=payload, catalog_fingerprint=catalog.fingerprint, computed_at=now,
+        ))
+    RecommendationSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["student"],
+        update_fields=SNAPSHOT_UPDATE_FIELDS,
+    )
+    return len(snapshots)
+
+
+# --- process pool plumbing for precompute_recommendations ---
+
+_worker_catalog = {}
+
+
+def worker_init(catalog: Catalog) -> None:
+    # the forked child must never reuse the parent's database socket
+    connections.close_all()
+    _worker_catalog["catalog"] = catalog
+
+
+def worker_chunk(student_ids: List[int]) -> int:
+    return compute_snapshots(student_ids, _worker_catalog["catalog"])
+
+
+def chunked(ids: Iterable[int], size: int):
+    chunk = []
+    for i in ids:
+        chunk.append(i)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,10 +1,23 @@
 from dataclasses import dataclass
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from django.utils import timezone
+
+from core.services.tags import normalize_tags
+
+# column order of the feature matrices accepted by score_batch
+FEATURE_COLUMNS = ('progress', 'recency_gap_days', 'tag_gap', 'hint_rate')
+WEIGHTS = {'progress_inverse': 0.6, 'recency_gap_days': 0.3, 'tag_gap': 0.2, 'hint_rate': -0.2}
+# courses never attempted (or idle longer than this) get the full recency weight
+RECENCY_CAP_DAYS = 10.0
+MAX_HINTS = 3.0
 
 
 def score_candidate(progress: float, recency_gap_days: float, tag_gap: float, hint_rate: float):
     progress_inverse = 100 - progress
-    w = {'progress_inverse': 0.6, 'recency_gap_days': 0.3, 'tag_gap': 0.2, 'hint_rate': -0.2}
+    w = WEIGHTS
     features = {'progress_inverse': progress_inverse, 'recency_gap_days': recency_gap_days, 'tag_gap': tag_gap,
                 'hint_rate': hint_rate}
     score = w['progress_inverse'] * (progress_inverse / 100) + w['recency_gap_days'] * (recency_gap_days / 10) + w[
@@ -15,3 +28,73 @@ def score_candidate(progress: float, recency_gap_days: float, tag_gap: float, hi
 def to_confidence(score: float) -> float:
     import math
     return max(0.0, min(1.0, 1 / (1 + math.exp(-score))))
+
+
+def recency_gap_days(last_activity: Optional[datetime], now: datetime) -> float:
+    """Calendar days (in TIME_ZONE) since the last activity, so the value only changes at midnight."""
+    if last_activity is None:
+        return RECENCY_CAP_DAYS
+    gap = (timezone.localdate(now) - timezone.localdate(last_activity)).days
+    return float(min(RECENCY_CAP_DAYS, max(0, gap)))
+
+
+def tag_gap(covered_tags: Iterable[str], course_tags: Iterable[str]) -> float:
+    """Share of the course's tags the student has not touched yet (0 when the course is untagged)."""
+    course_tags = set(normalize_tags(course_tags))
+    if not course_tags:
+        return 0.0
+    return 1.0 - len(course_tags.intersection(normalize_tags(covered_tags))) / len(course_tags)
+
+
+def tag_gaps(course_tags: np.ndarray, covered: np.ndarray) -> np.ndarray:
+    """
+    ``tag_gap`` for many courses at once. ``course_tags`` is the catalog's (courses, tags) boolean
+    matrix; ``covered`` is a boolean mask of the same shape (per-course coverage) or of one row
+    (coverage shared by every course), or float weights in 0..1 such as per-tag mastery. For a
+    boolean mask the values match ``tag_gap`` exactly.
+    """
+    totals = course_tags.sum(axis=-1)
+    hits = (course_tags * covered).sum(axis=-1)
+    return np.where(totals > 0, 1.0 - hits / np.maximum(totals, 1), 0.0)
+
+
+def hint_rate(hint_sum: int, hint_count: int) -> float:
+    return (hint_sum / hint_count) / MAX_HINTS if hint_count else 0.0
+
+
+@dataclass
+class BatchScores:
+    scores: np.ndarray       # (..., n_candidates)
+    confidences: np.ndarray  # same shape as scores
+    top_k: np.ndarray        # (..., k) candidate indices, best first; ties keep input order
+
+
+def score_batch(features, k: int = 3) -> BatchScores:
+    """
+    Score a whole feature matrix in one NumPy pass.
+
+    ``features`` has shape (n_candidates, 4) or (n_students, n_candidates, 4) with columns in
+    FEATURE_COLUMNS order. Arithmetic mirrors score_candidate term for term, so each score
+    equals the scalar result exactly; confidences use np.exp and agree with to_confidence to
+    within one ulp.
+    """
+    x = np.asarray(features, dtype=np.float64)
+    if x.shape[-1] != len(FEATURE_COLUMNS):
+        raise ValueError(f'Expected {len(FEATURE_COLUMNS)} feature columns, got shape {x.shape}')
+
+    w = WEIGHTS
+    progress_inverse = 100 - x[..., 0]
+    scores = w['progress_inverse'] * (progress_inverse / 100) + w['recency_gap_days'] * (x[..., 1] / 10) + w[
+        'tag_gap'] * x[..., 2] + w['hint_rate'] * x[..., 3]
+    confidences = np.clip(1 / (1 + np.exp(-scores)), 0.0, 1.0)
+
+    # stable sort on the negated score == Python's sort(reverse=True) tie behaviour
+    order = np.argsort(-scores, axis=-1, kind='stable')
+    return BatchScores(scores=scores, confidences=confidences, top_k=order[..., :max(0, k)])
+
+
+def feature_dict(row) -> Dict[str, float]:
+    """The ``reason_features`` payload for one row of a feature matrix (same keys as score_candidate)."""
+    progress, recency_gap_days, tag_gap, hint_rate = (float(v) for v in row)
+    return {'progress_inverse': 100 - progress, 'recency_gap_days': recency_gap_days, 'tag_gap': tag_gap,
+            'hint_rate': hint_rate}
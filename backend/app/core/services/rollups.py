@@ -0,0 +1,170 @@
+from datetime import timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import ArchivedAttempt, Attempt, AttemptDailyRollup, Student
+
+ROLLUP_COLUMNS = [
+    'student_id', 'lesson_id', 'day', 'attempt_count', 'correctness_sum', 'hints_sum', 'duration_sum',
+    'last_timestamp', 'last_attempt_id', 'last_correctness', 'last_hints_used', 'last_duration_sec',
+]
+_SUMMED = ['attempt_count', 'correctness_sum', 'hints_sum', 'duration_sum']
+_LATEST = ['last_attempt_id', 'last_correctness', 'last_hints_used', 'last_duration_sec', 'last_timestamp']
+
+
+def _upsert_sql() -> str:
+    table = connection.ops.quote_name(AttemptDailyRollup._meta.db_table)
+    q = connection.ops.quote_name
+    # every right-hand side sees the row as it was before this statement, so last_timestamp is
+    # compared against the old value even though it is updated in the same SET
+    newer = f"excluded.{q('last_timestamp')} >= {table}.{q('last_timestamp')}"
+    assignments = [f"{q(c)} = {table}.{q(c)} + excluded.{q(c)}" for c in _SUMMED] + [
+        f"{q(c)} = CASE WHEN {newer} THEN excluded.{q(c)} ELSE {table}.{q(c)} END" for c in _LATEST
+    ]
+    return (
+        f"INSERT INTO {table} ({', '.join(q(c) for c in ROLLUP_COLUMNS)}) "
+        f"VALUES ({', '.join(['%s'] * len(ROLLUP_COLUMNS))}) "
+        f"ON CONFLICT ({q('student_id')}, {q('lesson_id')}, {q('day')}) DO UPDATE SET {', '.join(assignments)}"
+    )
+
+
+def _params(a: Attempt) -> tuple:
+    ops = connection.ops
+    return (
+        a.student_id, a.lesson_id, ops.adapt_datefield_value(timezone.localdate(a.timestamp)),
+        1, a.correctness, a.hints_used, a.duration_sec,
+        ops.adapt_datetimefield_value(a.timestamp), a.pk, a.correctness, a.hints_used, a.duration_sec,
+    )
+
+
+def record_rollups(attempts: Iterable[Attempt]) -> None:
+    """
+    Write-path hook: fold freshly written attempts into their daily rollups with one
+    ``INSERT ... ON CONFLICT DO UPDATE`` per attempt (a single executemany), incrementing the
+    counters in SQL so concurrent writers never lose an update.
+    """
+    params = [_params(a) for a in attempts]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(_upsert_sql(), params)
+
+
+def latest_rollups(student_id: int):
+    """The student's newest rollup per lesson: one row per attempted lesson, however long the history."""
+    newest_day = (
+        AttemptDailyRollup.objects.filter(student_id=OuterRef('student_id'), lesson_id=OuterRef('lesson_id'))
+        .order_by('-day').values('day')[:1]
+    )
+    return AttemptDailyRollup.objects.filter(student_id=student_id, day=Subquery(newest_day))
+
+
+def _backfill_sql(student_ids: List[int]) -> Tuple[str, list]:
+    """
+    One ``INSERT ... SELECT`` building the students' rollups from ``Attempt`` plus ``ArchivedAttempt``:
+    grouped per (student, lesson, local day), with ``last_*`` taken from the day's newest row.
+    """
+    fields = ('id', 'student_id', 'lesson_id', 'timestamp', 'correctness', 'hints_used', 'duration_sec', 'day')
+    rows = [
+        model.objects.filter(student_id__in=student_ids).annotate(day=TruncDate('timestamp')).values_list(*fields)
+        for model in (Attempt, ArchivedAttempt)
+    ]
+    union, params = rows[0].union(rows[1], all=True).order_by().query.sql_with_params()
+    q = connection.ops.quote_name
+    newest = (
+        f"ROW_NUMBER() OVER (PARTITION BY {q('student_id')}, {q('lesson_id')}, {q('day')} "
+        f"ORDER BY {q('timestamp')} DESC, {q('id')} DESC)"
+    )
+
+    def latest(column: str) -> str:
+        return f"MAX(CASE WHEN {q('newest')} = 1 THEN {q(column)} END)"
+
+    table = q(AttemptDailyRollup._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(q(c) for c in ROLLUP_COLUMNS)}) "
+        f"SELECT {q('student_id')}, {q('lesson_id')}, {q('day')}, COUNT(*), SUM({q('correctness')}), "
+        f"SUM({q('hints_used')}), SUM({q('duration_sec')}), MAX({q('timestamp')}), {latest('id')}, "
+        f"{latest('correctness')}, {latest('hints_used')}, {latest('duration_sec')} "
+        f"FROM (SELECT u.*, {newest} AS {q('newest')} FROM ({union}) u) w "
+        f"GROUP BY {q('student_id')}, {q('lesson_id')}, {q('day')}"
+    )
+    return sql, list(params)
+
+
+def rollups_from_single_attempts(attempts) -> int:
+    """
+    Seeding shortcut: one rollup per row of the ``attempts`` queryset, copied by a single
+    ``INSERT ... SELECT``. Only valid when each (student, lesson) has one raw attempt, nothing
+    archived and no rollup yet, as for freshly generated students; ``backfill_rollups`` covers the rest.
+    """
+    select, params = (
+        attempts.annotate(day=TruncDate('timestamp')).order_by()
+        .values_list('student_id', 'lesson_id', 'day', 'correctness', 'hints_used', 'duration_sec', 'timestamp', 'id')
+        .query.sql_with_params()
+    )
+    q = connection.ops.quote_name
+    values = ['student_id', 'lesson_id', 'day', '1', 'correctness', 'hints_used', 'duration_sec',
+              'timestamp', 'id', 'correctness', 'hints_used', 'duration_sec']
+    sql = (
+        f"INSERT INTO {q(AttemptDailyRollup._meta.db_table)} ({', '.join(q(c) for c in ROLLUP_COLUMNS)}) "
+        f"SELECT {', '.join(v if v == '1' else q(v) for v in values)} FROM ({select}) a"
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def backfill_rollups(student_ids: Optional[Iterable[int]] = None, batch_size: int = 1000,
+                     force: bool = False) -> Iterator[Tuple[int, int]]:
+    """
+    Build rollups from the raw rows still on hand (``Attempt`` plus ``ArchivedAttempt``), one
+    transaction per chunk of ``batch_size`` students, yielding ``(rollups written, students
+    skipped)`` per chunk. Raw attempts only keep the latest attempt per lesson, so rebuilding a
+    student who already has rollups would throw away the history they hold: such students are
+    skipped unless ``force``. Meant for seeding and the first deployment only.
+    """
+    if student_ids is None:
+        student_ids = Student.objects.order_by('id').values_list('id', flat=True)
+    ids = list(student_ids)
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        skipped = 0
+        if not force:
+            have = set(AttemptDailyRollup.objects.filter(student_id__in=chunk).values_list('student_id', flat=True))
+            chunk = [s for s in chunk if s not in have]
+            skipped = len(have)
+        if not chunk:
+            yield 0, skipped
+            continue
+        sql, params = _backfill_sql(chunk)
+        with transaction.atomic():
+            if force:
+                AttemptDailyRollup.objects.filter(student_id__in=chunk).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                written = cursor.rowcount
+        yield written, skipped
+
+
+def archive_attempts(older_than_days: int, batch_size: int = 5000) -> Iterator[int]:
+    """
+    Move raw attempts older than ``older_than_days`` into ``ArchivedAttempt``, one batch per
+    transaction, yielding the rows moved per batch. Rollups (and the progress derived from
+    them) are untouched; only the raw history endpoint stops returning the moved rows.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    fields = ['id', 'student_id', 'lesson_id', 'timestamp', 'correctness', 'hints_used', 'duration_sec']
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Attempt.objects.filter(timestamp__lt=cutoff).order_by('id').values(*fields)[:batch_size]
+            )
+            if not rows:
+                return
+            now = timezone.now()
+            ArchivedAttempt.objects.bulk_create([ArchivedAttempt(archived_at=now, **row) for row in rows])
+            Attempt.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        yield len(rows)
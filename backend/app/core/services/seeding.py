@@ -0,0 +1,149 @@
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Attempt, Course, Lesson, Student
+from core.services.catalog import bump_catalog_version
+from core.services.mastery import rebuild_mastery
+from core.services.progress import rebuild_progress
+from core.services.rollups import rollups_from_single_attempts
+from core.services.tags import sync_lesson_tags
+
+User = get_user_model()
+
+TAG_POOL = [
+    "variables", "loops", "conditions", "functions", "arrays", "strings", "recursion", "classes",
+    "logic", "data", "sorting", "search", "graphs", "events", "io", "testing",
+]
+
+
+def seed_bulk(courses: int, lessons_per_course: int, students: int, attempts_per_student: int,
+              seed: int = 0, password: str = "password", batch_size: int = 2000,
+              log: Optional[Callable[[str], None]] = None, anchor: Optional[date] = None) -> dict:
+    """
+    Deterministic bulk generator: on the same database state, the same arguments, ``seed`` and
+    ``anchor`` always produce the same rows. Attempt timestamps fall in the 60 days before local
+    midnight at the start of ``anchor`` (default: today, so the data looks recent).
+
+    Each student gets a skill level and works through a few courses in lesson order, so
+    correctness, hints and timestamps look like real usage rather than uniform noise.
+    Everything goes through batched ``bulk_create`` (signals do not fire), so the daily rollups,
+    mastery vectors and the derived progress table are rebuilt and the catalog version bumped at the end.
+    Attempts are capped at one per (student, lesson) by the model's unique constraint. One
+    password hash is shared by every user. Numbering continues after earlier runs, so seeding twice adds rows.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    anchor = anchor or timezone.localdate()
+    now = timezone.make_aware(datetime.combine(anchor, time.min))
+    offset = User.objects.filter(username__startswith="student", username__endswith="@example.com").count()
+    course_offset = Course.objects.count()
+    existing_students = Student.objects.count()
+
+    with transaction.atomic():
+        course_rows = Course.objects.bulk_create([
+            Course(name=f"Course {course_offset + i + 1}", description=f"Generated course {course_offset + i + 1}",
+                   difficulty=1 + rng.randrange(3))
+            for i in range(courses)
+        ], batch_size=batch_size)
+        lesson_rows = Lesson.objects.bulk_create([
+            Lesson(course=c, title=f"{c.name} · Lesson {j + 1}", order_index=j + 1,
+                   tags=rng.sample(TAG_POOL, k=1 + rng.randrange(3)))
+            for c in course_rows for j in range(lessons_per_course)
+        ], batch_size=batch_size)
+        sync_lesson_tags(lesson_rows, batch_size=batch_size)
+    log(f"{len(course_rows)} courses, {len(lesson_rows)} lessons")
+
+    hashed = make_password(password)
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=f"student{n}@example.com", email=f"student{n}@example.com",
+                 first_name="Student", last_name=str(n), password=hashed)
+            for n in range(offset + 1, offset + students + 1)
+        ], batch_size=batch_size)
+        student_rows = Student.objects.bulk_create([
+            Student(user=u, name=f"Student {u.last_name}", email=u.email) for u in users
+        ], batch_size=batch_size)
+    log(f"{len(student_rows)} students")
+
+    # attempts go to the new lessons, or to the existing catalog when no courses were generated
+    pool = [(l.course_id, l.id) for l in lesson_rows] or list(
+        Lesson.objects.order_by("course_id", "order_index", "id").values_list("course_id", "id")
+    )
+    grouped = {}
+    for course_id, lesson_id in pool:
+        grouped.setdefault(course_id, []).append(lesson_id)
+    lessons_by_course = list(grouped.values())
+    per_student = min(attempts_per_student, len(pool))
+    shortest = min((len(ids) for ids in lessons_by_course), default=1)
+    written = 0
+    pending = []
+
+    # attempts are the bulk of the rows: plain parameter tuples through executemany, skipping model
+    # instances entirely (bulk_create on sqlite splits into ~140-row statements and dominates the run)
+    table = connection.ops.quote_name(Attempt._meta.db_table)
+    columns = ["student_id", "lesson_id", "timestamp", "correctness", "hints_used", "duration_sec"]
+    insert = (
+        f"INSERT INTO {table} ({', '.join(connection.ops.quote_name(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    adapt = connection.ops.adapt_datetimefield_value
+
+    def flush():
+        nonlocal written, pending
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(insert, pending)
+        written += len(pending)
+        pending = []
+
+    for s in student_rows:
+        skill = rng.betavariate(2, 2)
+        # the courses this student walks through, whole and in lesson order
+        needed = -(-per_student // shortest)
+        course_order = rng.sample(range(len(lessons_by_course)), min(needed, len(lessons_by_course)))
+        when = now - timedelta(days=rng.uniform(1, 60))
+        taken = 0
+        for course_index in course_order:
+            for lesson_id in lessons_by_course[course_index]:
+                if taken == per_student:
+                    break
+                correctness = min(1.0, max(0.0, rng.gauss(skill, 0.15)))
+                when += timedelta(minutes=rng.uniform(5, 24 * 60 / max(per_student, 1)))
+                pending.append((
+                    s.id,
+                    lesson_id,
+                    adapt(min(when, now)),
+                    round(correctness, 2),
+                    min(3, int(rng.expovariate(1.0 + 3 * correctness))),
+                    int(120 + rng.expovariate(1 / 600)),
+                ))
+                taken += 1
+            if taken == per_student:
+                break
+        if len(pending) >= 50_000:
+            flush()
+    if pending:
+        flush()
+    log(f"{written} attempts")
+
+    # a database that held no students before gets one full rebuild instead of a huge IN (...) list
+    rebuild_ids = None if offset == 0 and existing_students == 0 else [s.id for s in student_rows]
+    # fresh students: one attempt per lesson and nothing archived, so each attempt is its own daily rollup
+    first_student = student_rows[0].id if student_rows else None
+    rollup_rows = rollups_from_single_attempts(Attempt.objects.filter(student_id__gte=first_student)) if student_rows else 0
+    log(f"{rollup_rows} daily rollups")
+    mastery_rows = sum(rebuild_mastery(student_ids=rebuild_ids, batch_size=batch_size))
+    log(f"{mastery_rows} mastery vectors")
+    progress_rows = rebuild_progress(student_ids=rebuild_ids, batch_size=batch_size)
+    log(f"{progress_rows} progress rows")
+
+    bump_catalog_version()
+    return {
+        "courses": len(course_rows), "lessons": len(lesson_rows), "students": len(student_rows),
+        "attempts": written, "progress_rows": progress_rows,
+    }
@@ -0,0 +1,60 @@
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+
+from core.models import Lesson, LessonTag, Tag
+
+
+def normalize_tags(tags) -> List[str]:
+    """The ``Tag.name`` values for a lesson's JSON ``tags``: stripped, lower-cased, unique, sorted."""
+    return sorted({str(t).strip().lower() for t in (tags or ()) if str(t).strip()})
+
+
+def ensure_tags(names: Iterable[str]) -> Dict[str, int]:
+    """Tag ids by name, creating the missing tags (safe against concurrent creators)."""
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = names - ids.keys()
+    if missing:
+        Tag.objects.bulk_create([Tag(name=n) for n in sorted(missing)], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def sync_lesson_tags(lessons: Iterable[Lesson], batch_size: int = 1000) -> int:
+    """
+    Make the LessonTag rows of ``lessons`` match their JSON ``tags``; returns the rows added and
+    removed. Called from the Lesson post_save signal, and directly by bulk writers.
+    """
+    lessons = list(lessons)
+    changed = 0
+    for i in range(0, len(lessons), batch_size):
+        wanted = {l.id: set(normalize_tags(l.tags)) for l in lessons[i:i + batch_size]}
+        with transaction.atomic():
+            tag_ids = ensure_tags(set().union(*wanted.values()))
+            current = {}
+            for pk, lesson_id, name in LessonTag.objects.filter(lesson_id__in=wanted).values_list(
+                    'id', 'lesson_id', 'tag__name'):
+                current[(lesson_id, name)] = pk
+            stale = [pk for (lesson_id, name), pk in current.items() if name not in wanted[lesson_id]]
+            missing = [
+                LessonTag(lesson_id=lesson_id, tag_id=tag_ids[name])
+                for lesson_id, names in wanted.items() for name in names if (lesson_id, name) not in current
+            ]
+            if stale:
+                LessonTag.objects.filter(id__in=stale).delete()
+            LessonTag.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+        changed += len(stale) + len(missing)
+    return changed
+
+
+def lesson_ids_with_tag(course_id: int, tag: str) -> List[int]:
+    """Ids of the course's lessons carrying ``tag``, via the (tag, lesson) index."""
+    names = normalize_tags([tag])
+    if not names:
+        return []
+    return list(
+        LessonTag.objects.filter(tag__name=names[0], lesson__course_id=course_id).values_list('lesson_id', flat=True)
+    )
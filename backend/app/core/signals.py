@@ -1,8 +1,14 @@
 # core/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from core.models import Student
+from core.models import Attempt, Course, Lesson, Student
+from core.services.catalog import bump_catalog_version, get_catalog
+from core.services.mastery import record_mastery
+from core.services.progress import record_attempt, refresh_next_lessons_on_commit
+from core.services.rollups import record_rollups
+from core.services.tags import sync_lesson_tags
 
 User = get_user_model()
 
@@ -15,3 +21,59 @@ User = get_user_model()
 #             name=f"{instance.first_name} {instance.last_name}".strip() or instance.username,
 #             email=instance.email,
 #         )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_catalog(sender, **kwargs):
+    # bump now so this process stops serving the old snapshot, and again on commit in case another
+    # request rebuilt it from pre-commit rows in between
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Lesson)
+def index_lesson_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'tags' not in update_fields):
+        return
+    sync_lesson_tags([instance])
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_position(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_position = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {'order_index', 'course', 'course_id'} & set(update_fields):
+        return
+    instance._previous_position = (
+        Lesson.objects.filter(pk=instance.pk).values_list('course_id', 'order_index').first()
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def move_next_lesson_pointers(sender, instance, created, raw=False, **kwargs):
+    # only a new lesson or a changed position can move anyone's next lesson; title edits cannot
+    if raw:
+        return
+    previous = getattr(instance, '_previous_position', None)
+    if created:
+        refresh_next_lessons_on_commit([instance.course_id])
+    elif previous is not None and previous != (instance.course_id, instance.order_index):
+        refresh_next_lessons_on_commit({previous[0], instance.course_id})
+
+
+@receiver(post_delete, sender=Lesson)
+def drop_next_lesson_pointers(sender, instance, **kwargs):
+    refresh_next_lessons_on_commit([instance.course_id])
+
+
+@receiver(post_save, sender=Attempt)
+def roll_up_attempt(sender, instance, raw=False, **kwargs):
+    # single ORM saves (admin, scripts, seed_demo); the API's bulk upserts call the write-path hooks themselves
+    if not raw:
+        record_rollups([instance])
+        record_mastery(instance.student_id, [instance], get_catalog())
+        record_attempt(instance)
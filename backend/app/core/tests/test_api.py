@@ -1,8 +1,47 @@
 # core/tests/test_views.py
-from django.test import TestCase, Client
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from io import StringIO
+import json
+import os
+import re
+import signal
+import tempfile
+import threading
+import time
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Sum
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncClient, SimpleTestCase, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import AccessToken
-from core.models import Student, Course, Lesson, Attempt
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from users.services import revocation
+from users.services import auth as auth_service
+from users.services.auth import AuthService
+from django.conf import settings
+from django.core.cache import cache
+from core import db_routers
+from core.middleware import PerformanceMiddleware
+from core.authentication import STUDENT_ID_CLAIM
+from core.models import (
+    Student, Course, Lesson, Attempt, StudentCourseProgress, AttemptDailyRollup, ArchivedAttempt, LessonTag, StudentMastery,
+    RecommendationSnapshot, Tag,
+)
+from core.services import analysis_cache, analysis_pool, benchmark, metrics
+from core.services.rollups import ROLLUP_COLUMNS
+from core.services.seeding import seed_bulk
+from core.services.catalog import get_catalog
+from core.services.code_analysis import analyze
+from core.services.mastery import attempt_score, pack, rebuild_mastery, unpack
+from core.services.recommendation_snapshots import fresh_snapshot
+from core.services.recommender import recency_gap_days, score_batch, score_candidate, tag_gap, tag_gaps, to_confidence
 
 class StudentOverviewTests(TestCase):
     def setUp(self):
@@ -103,3 +142,1064 @@ class AttemptsCourseTests(TestCase):
         self.assertIn(r2.status_code, (200, 404))
         if r2.status_code == 200:
             self.assertIsInstance(r2.json(), list)
+
+
+class StudentCourseProgressTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="prog", password="p", email="prog@example.com")
+        self.student = Student.objects.create(user=self.user, name="prog", email="prog@example.com")
+        token = str(AccessToken.for_user(self.user))
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def post_attempt(self, lesson, **extra):
+        payload = {"lesson": lesson.id, "timestamp": "2025-01-01T10:00:00Z", "correctness": 0.5, **extra}
+        return self.client.post("/api/attempts/", data=payload, content_type="application/json")
+
+    def test_attempt_write_updates_progress_row(self):
+        c = Course.objects.create(name="P1", description="", difficulty=1)
+        l1 = Lesson.objects.create(course=c, title="First", tags=[], order_index=1)
+        l2 = Lesson.objects.create(course=c, title="Second", tags=[], order_index=2)
+        self.assertEqual(self.post_attempt(l2).status_code, 200)
+        self.assertEqual(self.post_attempt(l1, timestamp="2025-01-02T10:00:00Z").status_code, 200)
+
+        row = StudentCourseProgress.objects.get(student=self.student, course=c)
+        self.assertEqual(row.attempt_count, 2)
+        self.assertEqual(row.progress, 20)
+        self.assertEqual(row.last_activity.isoformat(), "2025-01-02T10:00:00+00:00")
+
+        course = next(x for x in self.client.get("/api/students/overview/").json()["courses"] if x["id"] == c.id)
+        self.assertEqual(course["progress"], 20)
+        self.assertEqual(course["next_up"], "First")
+
+    def test_overview_query_count_is_constant(self):
+        def overview_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get("/api/students/overview/").status_code, 200)
+            return len(ctx)
+
+        c = Course.objects.create(name="Q0", description="", difficulty=1)
+        self.post_attempt(Lesson.objects.create(course=c, title="L", tags=[], order_index=1))
+        baseline = overview_queries()
+
+        for i in range(10):
+            c = Course.objects.create(name=f"Q{i + 1}", description="", difficulty=1)
+            self.post_attempt(Lesson.objects.create(course=c, title="L", tags=[], order_index=1))
+        self.assertEqual(overview_queries(), baseline)
+
+    def test_rebuild_progress_command(self):
+        c = Course.objects.create(name="R1", description="", difficulty=1)
+        l1 = Lesson.objects.create(course=c, title="A", tags=[], order_index=1)
+        l2 = Lesson.objects.create(course=c, title="B", tags=[], order_index=2)
+        Attempt.objects.create(student=self.student, lesson=l1, timestamp=timezone.now(), correctness=1.0)
+        Attempt.objects.create(student=self.student, lesson=l2, timestamp=timezone.now(), correctness=0.5)
+        call_command("rebuild_progress", stdout=StringIO())
+        row = StudentCourseProgress.objects.get(student=self.student, course=c)
+        self.assertEqual(row.attempt_count, 2)
+        self.assertEqual(row.next_lesson_id, l2.id)  # l1 is mastered
+
+
+class BatchScoringTests(SimpleTestCase):
+    rows = [(0, 5.0, 0.3, 0.0), (40, 5.0, 0.3, 1 / 3.0), (100, 12.5, 0.0, 0.9), (70, 0.0, 1.0, 0.25)]
+
+    def test_batch_scores_match_scalar_exactly(self):
+        batch = score_batch(self.rows, k=2)
+        for row, score, conf in zip(self.rows, batch.scores, batch.confidences):
+            expected, features = score_candidate(*row)
+            self.assertEqual(float(score), expected)
+            self.assertAlmostEqual(float(conf), to_confidence(expected), places=12)
+        ranked = sorted(range(len(self.rows)), key=lambda i: score_candidate(*self.rows[i])[0], reverse=True)
+        self.assertEqual(list(batch.top_k), ranked[:2])
+
+    def test_batch_over_many_students(self):
+        matrix = np.array([self.rows, self.rows[::-1]])
+        batch = score_batch(matrix, k=1)
+        self.assertEqual(batch.scores.shape, (2, 4))
+        self.assertEqual(batch.top_k.shape, (2, 1))
+        self.assertEqual(int(batch.top_k[0, 0]), 3 - int(batch.top_k[1, 0]))
+
+
+class FeatureStoreTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="feat", password="p", email="feat@example.com")
+        self.student = Student.objects.create(user=self.user, name="feat", email="feat@example.com")
+        token = str(AccessToken.for_user(self.user))
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def test_features_come_from_progress_row(self):
+        c = Course.objects.create(name="F1", description="", difficulty=1)
+        l1 = Lesson.objects.create(course=c, title="A", tags=["loops", "vars"], order_index=1)
+        Lesson.objects.create(course=c, title="B", tags=["lists"], order_index=2)
+        when = (timezone.now() - timedelta(days=3)).isoformat()
+        payload = {"lesson": l1.id, "timestamp": when, "correctness": 0.5, "hints_used": 2}
+        self.client.post("/api/attempts/", data=payload, content_type="application/json")
+
+        row = StudentCourseProgress.objects.get(student=self.student, course=c)
+        self.assertEqual((row.hint_sum, row.hint_count), (2, 1))
+        self.assertEqual(row.covered_tags, ["loops", "vars"])
+
+        features = self.client.get("/api/students/recommendation/").json()["reason_features"]
+        self.assertEqual(features["recency_gap_days"], 3.0)
+        # two of the course's three tags, each at the mastery of the one attempt
+        self.assertAlmostEqual(features["tag_gap"], 1 - 2 * attempt_score(0.5, 2) / 3, places=6)
+        self.assertAlmostEqual(features["hint_rate"], 2 / 3)
+
+
+class CodeAnalysisEngineTests(SimpleTestCase):
+    def rules(self, code):
+        return [i["rule"] for i in analyze(code)]
+
+    def test_rules_grouped_in_registration_order(self):
+        code = "try:\n  print(1)\nexcept:\n  pass\ndef f(a, b):\n  return b\n"
+        self.assertEqual(self.rules(code), ["unused-arg", "bare-except", "print-call"])
+
+    def test_nested_scopes_share_one_walk(self):
+        code = "def outer(x, y):\n  def inner(z):\n    return x\n  return inner\n"
+        messages = [i["message"] for i in analyze(code)]
+        self.assertEqual(messages, ['Function arg "y" appears unused.', 'Function arg "z" appears unused.'])
+
+    def test_deeply_nested_source_does_not_recurse(self):
+        code = "x = " + "[" * 90 + "]" * 90 + "\n" + "def f(a):\n  return a\n" * 2000
+        self.assertEqual(analyze(code), [])
+
+    def test_syntax_error(self):
+        self.assertEqual(self.rules("def ("), ["syntax-error"])
+
+
+class AnalyzeCodeCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="cache", password="p", email="cache@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+
+    def post(self, code):
+        return self.client.post("/api/analyze-code/", data={"code": code}, content_type="application/json")
+
+    def test_resubmission_is_served_from_cache(self):
+        first = self.post("def cached_fn(a):\n  print(1)\n")
+        second = self.post("def cached_fn(a):\r\n  print(1)\r\n")
+        self.assertEqual(first["X-Analysis-Cache"], "MISS")
+        self.assertEqual(second["X-Analysis-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+
+    def test_key_tracks_ruleset_version(self):
+        key = analysis_cache.cache_key("x = 1")
+        with mock.patch.object(analysis_cache, "ENGINE_VERSION", -1):
+            self.assertNotEqual(analysis_cache.cache_key("x = 1"), key)
+
+    def test_lru_bound(self):
+        lru = analysis_cache.LRUCache(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+
+class AnalysisPoolTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="pool", password="p", email="pool@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+
+    def post(self, code):
+        return self.client.post("/api/analyze-code/", data={"code": code}, content_type="application/json")
+
+    def test_runs_in_worker_pool(self):
+        issues = analysis_pool.run_analysis("def pooled(a):\n  pass\n")
+        self.assertEqual([i["rule"] for i in issues], ["unused-arg"])
+
+    def test_oversized_source_is_rejected(self):
+        with mock.patch.object(analysis_pool, "MAX_SOURCE_BYTES", 10):
+            r = self.post("x = 'this is far too long'\n")
+        self.assertEqual(r.status_code, 413)
+
+    def test_saturated_queue_returns_503(self):
+        with mock.patch.object(analysis_pool, "_slots", threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            r = self.post("saturated = True\n")
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r["Retry-After"], "1")
+
+    def test_job_timeout(self):
+        code = "x = 1\n" * 15_000  # just under MAX_SOURCE_BYTES, far over a millisecond to analyze
+        with mock.patch.object(analysis_pool, "JOB_TIMEOUT", 0.001):
+            with self.assertRaisesMessage(analysis_pool.AnalysisRejected, "timed out"):
+                analysis_pool.run_analysis(code)
+
+    def test_job_restores_the_alarm_handler(self):
+        handler = signal.getsignal(signal.SIGALRM)
+        self.assertEqual(analysis_pool._analyze_job("x = 1\n", 5.0)[0], "ok")
+        self.assertIs(signal.getsignal(signal.SIGALRM), handler)
+        self.assertEqual(signal.getitimer(signal.ITIMER_REAL), (0.0, 0.0))
+
+    def test_queued_job_gets_503_without_recycling(self):
+        slot, job = 0, 10**9
+        analysis_pool._slot_job[slot], analysis_pool._slot_started[slot] = 0, 0.0
+        with mock.patch.object(analysis_pool, "QUEUE_TIMEOUT", 0.2), \
+                mock.patch.object(analysis_pool, "_recycle") as recycle:
+            with self.assertRaises(analysis_pool.AnalysisBusy):
+                analysis_pool._wait(None, Future(), slot, job)
+        recycle.assert_not_called()
+
+    def test_stuck_running_job_recycles_the_pool(self):
+        slot, job = 0, 10**9
+        analysis_pool._slot_job[slot], analysis_pool._slot_started[slot] = job, time.time()
+        try:
+            with mock.patch.object(analysis_pool, "JOB_TIMEOUT", -0.8), \
+                    mock.patch.object(analysis_pool, "_recycle") as recycle:
+                with self.assertRaises(analysis_pool.AnalysisRejected):
+                    analysis_pool._wait("executor", Future(), slot, job)
+            recycle.assert_called_once_with("executor")
+        finally:
+            analysis_pool._slot_job[slot], analysis_pool._slot_started[slot] = 0, 0.0
+
+
+class AttemptBatchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="batch", password="p", email="batch@example.com")
+        self.student = Student.objects.create(user=self.user, name="batch", email="batch@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(self.user)}'
+        self.course = Course.objects.create(name="B", description="", difficulty=1)
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", tags=[], order_index=i)
+                        for i in range(60)]
+
+    def post(self, attempts):
+        return self.client.post("/api/attempts/batch/", data={"attempts": attempts}, content_type="application/json")
+
+    def item(self, lesson, correctness=0.5):
+        return {"lesson": lesson.id, "timestamp": "2025-02-01T10:00:00Z", "correctness": correctness}
+
+    def test_per_item_statuses(self):
+        l0, l1 = self.lessons[:2]
+        Attempt.objects.create(student=self.student, lesson=l1, timestamp=timezone.now(), correctness=0.1)
+        r = self.post([self.item(l0), self.item(l1, 0.9), self.item(l0, 0.7),
+                       {"lesson": 999999, "timestamp": "2025-02-01T10:00:00Z", "correctness": 0.5},
+                       self.item(l0, 2.0)])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([x["status"] for x in r.json()["results"]],
+                         ["duplicate", "updated", "created", "error", "error"])
+        self.assertEqual(Attempt.objects.get(student=self.student, lesson=l0).correctness, 0.7)
+        self.assertEqual(Attempt.objects.get(student=self.student, lesson=l1).correctness, 0.9)
+        self.assertEqual(StudentCourseProgress.objects.get(student=self.student, course=self.course).attempt_count, 2)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def queries(lessons):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.post([self.item(l) for l in lessons]).status_code, 200)
+            return len(ctx)
+
+        get_catalog()  # lesson tags for the mastery update come from the catalog snapshot
+        self.assertEqual(queries(self.lessons[:5]), queries(self.lessons[5:60]))
+
+    def test_all_invalid_is_400(self):
+        self.assertEqual(self.post([{"lesson": "x"}]).status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+class AttemptUpsertTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="ups", password="p", email="ups@example.com")
+        self.student = Student.objects.create(user=self.user, name="ups", email="ups@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(self.user)}'
+        self.lesson = Lesson.objects.create(course=Course.objects.create(name="U", difficulty=1), title="L", tags=[])
+
+    def post(self, correctness):
+        payload = {"lesson": self.lesson.id, "timestamp": "2025-03-01T10:00:00Z", "correctness": correctness}
+        return self.client.post("/api/attempts/", data=payload, content_type="application/json")
+
+    def test_repeat_posts_update_a_single_row(self):
+        first, second = self.post(0.2), self.post(0.8)
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(first.json()["id"], second.json()["id"])
+        self.assertEqual(second.json()["student"], self.student.id)
+        self.assertEqual(Attempt.objects.filter(student=self.student, lesson=self.lesson).count(), 1)
+        self.assertEqual(Attempt.objects.get().correctness, 0.8)
+
+    def test_database_rejects_duplicates(self):
+        Attempt.objects.create(student=self.student, lesson=self.lesson, timestamp=timezone.now(), correctness=0.1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attempt.objects.create(student=self.student, lesson=self.lesson, timestamp=timezone.now(), correctness=0.2)
+
+
+class AttemptHistoryTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="hist", password="p", email="hist@example.com")
+        self.student = Student.objects.create(user=self.user, name="hist", email="hist@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(self.user)}'
+        course = Course.objects.create(name="H", difficulty=1)
+        start = timezone.now() - timedelta(days=30)
+        self.lessons = [Lesson.objects.create(course=course, title=f"L{i}", order_index=i) for i in range(7)]
+        for i, lesson in enumerate(self.lessons):
+            Attempt.objects.create(student=self.student, lesson=lesson, timestamp=start + timedelta(days=i),
+                                   correctness=0.5)
+
+    def test_cursor_pages_cover_history_newest_first(self):
+        seen, url = [], "/api/attempts/?page_size=3"
+        while url:
+            page = self.client.get(url).json()
+            seen += [a["lesson"] for a in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [l.id for l in reversed(self.lessons)])
+
+    def test_since_and_lesson_filters(self):
+        since = (timezone.now() - timedelta(days=26, hours=12)).isoformat()
+        r = self.client.get("/api/attempts/", {"since": since})
+        self.assertEqual(len(r.json()["results"]), 3)
+        r = self.client.get("/api/attempts/", {"lesson": self.lessons[2].id})
+        self.assertEqual([a["lesson"] for a in r.json()["results"]], [self.lessons[2].id])
+        self.assertEqual(self.client.get("/api/attempts/", {"since": "yesterday"}).status_code, 400)
+
+    def test_ndjson_stream(self):
+        r = self.client.get("/api/attempts/", {"stream": "ndjson"})
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(r.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]["lesson"], self.lessons[-1].id)
+        self.assertTrue(rows[0]["timestamp"].endswith("Z"))
+
+
+class StudentAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="sa", password="p", email="sa@example.com")
+        self.student = Student.objects.create(user=self.user, name="sa", email="sa@example.com")
+
+    def auth(self, token):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def test_claim_resolves_user_and_student_in_one_query(self):
+        self.auth(AuthService.generate_jwt_tokens(self.user)["access"])
+        get_catalog()  # course lookups are served from the catalog snapshot
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/courses/999999/")
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(len(ctx), 1)  # just the auth join
+
+    def test_stale_claim_falls_back_to_user_link(self):
+        token = AccessToken.for_user(self.user)
+        token[STUDENT_ID_CLAIM] = self.student.id + 1000
+        self.auth(token)
+        r = self.client.get("/api/students/overview/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["student"]["id"], self.student.id)
+
+    def test_claim_for_deleted_student_is_404(self):
+        self.auth(AuthService.generate_jwt_tokens(self.user)["access"])
+        self.student.delete()
+        self.assertEqual(self.client.get("/api/students/overview/").status_code, 404)
+
+
+class UserProfileClaimsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        AuthService.register_user("Ada Lovelace", "ada@example.com", "pw-123456")
+
+    def test_login_serializes_without_student_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.post("/api/user/login/", {"email": "ada@example.com", "password": "pw-123456"},
+                                 content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        student = Student.objects.get(email="ada@example.com")
+        self.assertEqual(r.json()["user"]["student_id"], student.id)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "core_student"' in q["sql"]])
+
+    def test_register_does_not_borrow_another_users_student(self):
+        other = User.objects.create_user(username="other", password="p")
+        Student.objects.create(user=other, name="Other", email="shared@example.com")
+        User.objects.create_user(username="shared", email="shared@example.com", password="p")
+        user = AuthService.register_user("Shared", "shared@example.com", "pw-123456")
+        self.assertIsNone(AuthService.student_id_for(user))
+
+    def test_me_answers_from_token_claims(self):
+        user = User.objects.get(username="ada@example.com")
+        tokens = AuthService.generate_jwt_tokens(user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {tokens['access']}"
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/user/me/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        body = r.json()["user"]
+        self.assertEqual(body["full_name"], "Ada Lovelace")
+        self.assertEqual(body["student_id"], Student.objects.get(user=user).id)
+
+    def test_me_falls_back_to_database_for_legacy_tokens(self):
+        user = User.objects.get(username="ada@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        r = self.client.get("/api/user/me/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["user"]["email"], "ada@example.com")
+        self.assertEqual(r.json()["user"]["student_id"], Student.objects.get(user=user).id)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="cat", email="cat@example.com", password="p")
+        Student.objects.create(user=user, name="cat", email="cat@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        self.course = Course.objects.create(name="C", description="d", difficulty=1)
+        Lesson.objects.create(course=self.course, title="Second", tags=["b"], order_index=2)
+        Lesson.objects.create(course=self.course, title="First", tags=["a"], order_index=1)
+
+    def test_catalog_reads_skip_the_database_once_warm(self):
+        self.client.get(f"/api/courses/{self.course.id}/")
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(f"/api/lesson/{self.course.id}")
+        self.assertEqual([l["title"] for l in r.json()], ["First", "Second"])
+        self.assertFalse([q for q in ctx.captured_queries if "core_lesson" in q["sql"] or "core_course" in q["sql"]])
+
+    def test_lesson_changes_bump_the_version(self):
+        before = get_catalog()
+        self.assertEqual(before.course(self.course.id).tags, frozenset({"a", "b"}))
+        Lesson.objects.create(course=self.course, title="Third", tags=["c"], order_index=3)
+        after = get_catalog()
+        self.assertNotEqual(before.version, after.version)
+        self.assertEqual([l.title for l in after.course(self.course.id).lessons], ["First", "Second", "Third"])
+        course_id = self.course.id
+        self.course.delete()
+        self.assertIsNone(get_catalog().course(course_id))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="etag", email="etag@example.com", password="p")
+        Student.objects.create(user=user, name="etag", email="etag@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        course = Course.objects.create(name="C", description="d", difficulty=1)
+        self.lesson = Lesson.objects.create(course=course, title="L1", tags=["a"], order_index=1)
+
+    def test_matching_etag_is_304_before_the_payload_is_built(self):
+        for url in ("/api/students/overview/", "/api/students/recommendation/", "/api/courses/"):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertIn("private", first["Cache-Control"])
+            with CaptureQueriesContext(connection) as ctx:
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again.content, b"")
+            self.assertEqual(len(ctx), 2, url)  # auth join + the validator aggregate
+
+    def test_attempt_write_changes_the_etag(self):
+        etag = self.client.get("/api/students/overview/")["ETag"]
+        self.client.post("/api/attempts/", {
+            "lesson": self.lesson.id, "timestamp": timezone.now().isoformat(),
+            "correctness": 0.5, "hints_used": 0, "duration_sec": 30,
+        }, content_type="application/json")
+        r = self.client.get("/api/students/overview/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertEqual(r.json()["courses"][0]["progress"], 10)
+
+    def test_mastery_rebuild_changes_the_etag(self):
+        self.client.post("/api/attempts/", {
+            "lesson": self.lesson.id, "timestamp": timezone.now().isoformat(), "correctness": 0.5,
+        }, content_type="application/json")
+        etag = self.client.get("/api/students/overview/")["ETag"]
+        list(rebuild_mastery())
+        r = self.client.get("/api/students/overview/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+
+    def test_recency_counts_calendar_days_like_the_daily_etag(self):
+        now = timezone.now().replace(hour=1, minute=0)
+        self.assertEqual(recency_gap_days(now - timedelta(hours=2), now), 1.0)
+        self.assertEqual(recency_gap_days(now - timedelta(hours=1), now), 0.0)
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="dash", email="dash@example.com", password="p")
+        self.student = Student.objects.create(user=self.user, name="dash", email="dash@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.user)}"
+        course = Course.objects.create(name="C", description="d", difficulty=1)
+        self.lesson = Lesson.objects.create(course=course, title="L1", tags=["a"], order_index=1)
+        self.client.post("/api/attempts/", {
+            "lesson": self.lesson.id, "timestamp": timezone.now().isoformat(),
+            "correctness": 0.5, "hints_used": 1, "duration_sec": 30,
+        }, content_type="application/json")
+
+    def test_dashboard_matches_the_individual_endpoints(self):
+        r = self.client.get("/api/students/dashboard/")
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertEqual(body["overview"], self.client.get("/api/students/overview/").json())
+        self.assertEqual(body["recommendation"], self.client.get("/api/students/recommendation/").json())
+        self.assertEqual(body["courses"], self.client.get("/api/courses/").json())
+
+    def test_sections_limit_the_work(self):
+        get_catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/students/dashboard/?sections=courses")
+        self.assertEqual(list(r.json()), ["courses"])
+        self.assertEqual(len(ctx), 2)  # auth join + the attempts scan
+        self.assertEqual(self.client.get("/api/students/dashboard/?sections=nope").status_code, 400)
+
+    def test_dashboard_requires_a_student(self):
+        self.client.defaults.pop("HTTP_AUTHORIZATION")
+        self.assertEqual(self.client.get("/api/students/dashboard/").status_code, 401)
+        self.client.defaults["HTTP_AUTHORIZATION"] = "Bearer not-a-token"
+        self.assertEqual(self.client.get("/api/students/dashboard/").status_code, 401)
+        self.student.delete()
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.user)}"
+        self.assertEqual(self.client.get("/api/students/dashboard/").status_code, 404)
+
+
+class RecommendationSnapshotTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="snap", email="snap@example.com", password="p")
+        self.student = Student.objects.create(user=user, name="snap", email="snap@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        self.course = Course.objects.create(name="C", description="d", difficulty=1)
+        self.lesson = Lesson.objects.create(course=self.course, title="L1", tags=["a"], order_index=1)
+        Course.objects.create(name="D", description="d", difficulty=2)
+
+    def precompute(self, *args):
+        out = StringIO()
+        call_command("precompute_recommendations", "--workers", "0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_snapshot_is_served_until_the_student_writes(self):
+        live = self.client.get("/api/students/recommendation/")
+        self.assertEqual(live["X-Recommendation-Source"], "live")
+        self.assertIn("students/sec", self.precompute())
+
+        served = self.client.get("/api/students/recommendation/")
+        self.assertEqual(served["X-Recommendation-Source"], "snapshot")
+        self.assertEqual(served.json(), live.json())
+
+        self.client.post("/api/attempts/", {
+            "lesson": self.lesson.id, "timestamp": timezone.now().isoformat(),
+            "correctness": 0.5, "hints_used": 0, "duration_sec": 30,
+        }, content_type="application/json")
+        self.assertEqual(self.client.get("/api/students/recommendation/")["X-Recommendation-Source"], "live")
+
+    def test_catalog_change_and_since_filter(self):
+        self.precompute()
+        Lesson.objects.create(course=self.course, title="L2", tags=["b"], order_index=2)
+        self.assertEqual(self.client.get("/api/students/recommendation/")["X-Recommendation-Source"], "live")
+        out = self.precompute("--since", (timezone.now() + timedelta(days=1)).date().isoformat())
+        self.assertIn("for 0 students", out)
+
+    def test_snapshot_from_before_midnight_is_not_served(self):
+        self.precompute()
+        midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        RecommendationSnapshot.objects.filter(student=self.student).update(computed_at=midnight - timedelta(hours=1))
+        catalog = get_catalog()
+        self.assertIsNotNone(fresh_snapshot(self.student.id, catalog, now=midnight - timedelta(minutes=1)))
+        self.assertIsNone(fresh_snapshot(self.student.id, catalog, now=midnight + timedelta(hours=11)))
+
+    def test_mastery_update_after_the_snapshot_invalidates_it(self):
+        self.precompute()
+        self.assertEqual(self.client.get("/api/students/recommendation/")["X-Recommendation-Source"], "snapshot")
+        StudentMastery.objects.create(student=self.student, vector=pack(np.array([0.9])))
+        self.assertEqual(self.client.get("/api/students/recommendation/")["X-Recommendation-Source"], "live")
+
+
+class QueryBudgetTests(TestCase):
+    """The benchmark's query budgets at a tiny volume: an N+1 regression fails here, not just in a bench run."""
+
+    # password hashing dominates these and their query counts are covered by the benchmark command
+    SLOW = {"auth-register", "auth-login"}
+
+    def test_endpoints_stay_within_query_budgets(self):
+        seed_bulk(courses=3, lessons_per_course=4, students=3, attempts_per_student=5, seed=1)
+        ctx = benchmark.bench_context("password")
+        only = [e.name for e in benchmark.ENDPOINTS if e.name not in self.SLOW]
+        results = benchmark.run_benchmarks(ctx, iterations=2, only=only)
+        self.assertEqual(set(results), set(only))
+        self.assertEqual(benchmark.budget_violations(results), [])
+        self.assertTrue(all(r["status"] < 400 for name, r in results.items() if name != "profile"))
+
+    def test_every_route_is_benchmarked(self):
+        from core.urls import urlpatterns as core_routes
+        from users.urls import urlpatterns as user_routes
+        names = {e.name for e in benchmark.ENDPOINTS}
+        self.assertEqual({p.name for p in core_routes + user_routes} - names, set())
+        self.assertEqual(names - set(benchmark.QUERY_BUDGETS), set())
+
+    def test_read_only_run_skips_endpoints_that_write(self):
+        seed_bulk(courses=2, lessons_per_course=3, students=2, attempts_per_student=4, seed=1)
+        User.objects.create_user(username="ops", password="p", is_staff=True)  # a real database brings its own staff
+        before = (Attempt.objects.count(), User.objects.count(), OutstandingToken.objects.count())
+        ctx = benchmark.bench_context("password", read_only=True)
+        results = benchmark.run_benchmarks(ctx, iterations=1, read_only=True)
+        self.assertEqual(set(results), {e.name for e in benchmark.ENDPOINTS if not e.writes})
+        self.assertEqual((Attempt.objects.count(), User.objects.count(), OutstandingToken.objects.count()), before)
+        self.assertEqual(results["student-overview"]["status"], 200)
+
+    def test_queries_on_other_aliases_are_counted(self):
+        replica = connections.create_connection("default")  # stands in for the replica alias
+        try:
+            with mock.patch.object(benchmark.connections, "all", return_value=[connection, replica]):
+                with benchmark.capture_all_queries() as captured:
+                    Student.objects.count()
+                    with replica.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+            self.assertEqual([len(c) for c in captured], [1, 1])
+        finally:
+            replica.close()
+
+    def test_compare_flags_query_regressions(self):
+        before = {"student-overview": {"p95_ms": 5.0, "queries": 3, "peak_kb": 10.0}}
+        after = {"student-overview": {"p95_ms": 5.5, "queries": 9, "peak_kb": 10.0}}
+        _, regressions = benchmark.compare(before, after, latency_tolerance=0.5)
+        self.assertEqual(regressions, ["student-overview: queries 3 -> 9"])
+
+
+class SeedDemoTests(TestCase):
+    def test_generator_flags_build_consistent_data(self):
+        out = StringIO()
+        call_command("seed_demo", "--students", "4", "--courses", "3", "--lessons-per-course", "5",
+                     "--attempts-per-student", "7", "--seed", "3", stdout=out)
+        self.assertIn("Generated 4 students", out.getvalue())
+        self.assertEqual(Attempt.objects.count(), 28)
+        self.assertEqual(Lesson.objects.count(), 15)
+        for student in Student.objects.all():
+            self.assertTrue(student.user.check_password("password"))
+        # derived progress matches a from-scratch rebuild and the catalog sees the new courses
+        self.assertEqual(StudentCourseProgress.objects.aggregate(n=Sum("attempt_count"))["n"], 28)
+        self.assertEqual(len(get_catalog().courses), 3)
+
+        call_command("seed_demo", "--students", "2", "--attempts-per-student", "7", stdout=StringIO())
+        self.assertEqual(Student.objects.count(), 6)
+        self.assertEqual(Attempt.objects.count(), 28 + 14)
+
+    def test_same_seed_and_anchor_give_the_same_attempts(self):
+        def generate():
+            call_command("seed_demo", "--students", "3", "--courses", "2", "--lessons-per-course", "3",
+                         "--attempts-per-student", "4", "--seed", "5", "--anchor", "2025-03-01", stdout=StringIO())
+            rows = list(Attempt.objects.order_by("student__name", "lesson__title")
+                        .values_list("student__name", "lesson__title", "timestamp", "correctness", "hints_used"))
+            User.objects.all().delete()
+            Course.objects.all().delete()
+            return rows
+
+        first = generate()
+        self.assertTrue(all(row[2] < timezone.make_aware(datetime(2025, 3, 1)) for row in first))
+        self.assertEqual(generate(), first)
+
+    def test_demo_data_can_be_seeded_twice(self):
+        call_command("seed_demo", stdout=StringIO())
+        call_command("seed_demo", stdout=StringIO())
+        self.assertEqual(Attempt.objects.count(), 1)
+        self.assertEqual(StudentCourseProgress.objects.get().attempt_count, 1)
+
+
+class PerformanceMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.client = Client()
+        self.user = User.objects.create_user(username="ops", email="ops@example.com", password="p")
+        Student.objects.create(user=self.user, name="ops", email="ops@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.user)}"
+
+    def test_server_timing_and_histograms(self):
+        r = self.client.get("/api/students/overview/")
+        self.assertRegex(r["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        body = self.client.get("/api/metrics/").content.decode()
+        self.assertIn('http_responses_total{route="core:student-overview",status="2xx"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="core:student-overview",le="+Inf"} 1', body)
+        self.assertIn('http_responses_total{route="core:metrics",status="4xx"} 1', body)
+        self.assertIn("analyze_code_cache_hits_total", body)
+
+    def test_async_requests_stay_async_and_count_queries(self):
+        async def get_response(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(PerformanceMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(PerformanceMiddleware(lambda request: HttpResponse())))
+
+        r = async_to_sync(AsyncClient().get)(
+            "/api/students/dashboard/", headers={"authorization": self.client.defaults["HTTP_AUTHORIZATION"]},
+        )
+        self.assertEqual(r.status_code, 200)
+        queries = int(re.search(r'desc="(\d+) queries"', r["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+
+    def test_histogram_buckets_are_cumulative(self):
+        h = metrics.Histogram((1, 5))
+        for v in (0.5, 1, 3, 10):
+            h.observe(v)
+        self.assertEqual(h.snapshot(), ([("1", 2), ("5", 3), ("+Inf", 4)], 14.5, 4))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        revocation.clear_local()
+        self.client = Client()
+        self.user = User.objects.create_user(username="rt@example.com", email="rt@example.com", password="p")
+        self.refresh = AuthService.generate_jwt_tokens(self.user)["refresh"]
+
+    def _refresh(self, token):
+        self.client.cookies.clear()  # the view prefers the cookie over the body
+        return self.client.post("/api/user/refresh/", {"refresh": token}, content_type="application/json")
+
+    def test_rotation_rejects_reuse_from_cache_without_queries(self):
+        r = self._refresh(self.refresh)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r.cookies["refresh_token"].value, self.refresh)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=RefreshToken(self.refresh, verify=False)["jti"]).exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._refresh(self.refresh).status_code, 401)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        # another worker without the JTI in its local cache still rejects it in the database
+        revocation.clear_local()
+        with mock.patch.object(revocation, "REVOKED_CACHE_ALIAS", None):
+            self.assertEqual(self._refresh(self.refresh).status_code, 401)
+
+        body = metrics.render_prometheus()
+        self.assertIn('auth_token_refresh_seconds_count{outcome="rotated"} 1', body)
+        self.assertIn('auth_token_refresh_seconds_count{outcome="revoked"} 2', body)
+
+    def test_rotation_renews_profile_claims_once_they_are_too_old(self):
+        self.user.first_name, self.user.last_name = "New", "Name"
+        self.user.save()
+        me = lambda r: self.client.get("/api/user/me/", HTTP_AUTHORIZATION=f"Bearer {r.json()['token']}").json()["user"]
+
+        rotated = self._refresh(self.refresh)
+        self.assertEqual(me(rotated)["full_name"], "")  # still within the max age: carried forward
+
+        with mock.patch.object(auth_service, "PROFILE_CLAIMS_MAX_AGE", 0):
+            renewed = self._refresh(rotated.cookies["refresh_token"].value)
+        self.assertEqual(renewed.status_code, 200)
+        self.assertEqual(me(renewed)["full_name"], "New Name")
+        successor = RefreshToken(renewed.cookies["refresh_token"].value)
+        self.assertEqual(successor["full_name"], "New Name")
+
+    def test_deactivation_revokes_outstanding_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 1)
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+
+    def test_prune_tokens_deletes_expired_rows(self):
+        AuthService.blacklist_refresh_token(self.refresh)
+        live = AuthService.generate_jwt_tokens(self.user)["refresh"]
+        OutstandingToken.objects.exclude(jti=RefreshToken(live)["jti"]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        out = StringIO()
+        call_command("prune_tokens", "--batch-size", "1", stdout=out)
+        self.assertIn("Pruned 1 outstanding and 1 blacklisted", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [RefreshToken(live)["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportRosterTests(TestCase):
+    def test_links_like_register_user(self):
+        Student.objects.create(name="Old Name", email="kid1@school.org")
+        User.objects.create_user(username="kid2@school.org", email="kid2@school.org", password="x")
+        registered = AuthService.register_user("Kid Three", "kid3@school.org", "pw")
+        path = self.roster(
+            "name,email,password\n"
+            "Kid One,Kid1@School.org,pw-1\n"
+            "Kid Two,kid2@school.org,pw-2\n"
+            "Kid Three,kid3@school.org,pw-3\n"
+            "Kid Four,kid4@school.org,\n"
+            "Again,kid4@school.org,pw\n"
+        )
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("import_roster", path, "--workers", "0", stdout=out, stderr=err)
+        self.assertIn("2 users created, 2 students created, 1 students linked, 1 already registered", out.getvalue())
+        self.assertIn("line 6: duplicate of line 5", err.getvalue())
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        kid1 = Student.objects.select_related("user").get(email="kid1@school.org")
+        self.assertEqual((kid1.name, kid1.user.first_name, kid1.user.last_name), ("Kid One", "Kid", "One"))
+        self.assertTrue(kid1.user.check_password("pw-1"))
+        self.assertEqual(Student.objects.get(email="kid2@school.org").user.username, "kid2@school.org")
+        self.assertEqual(Student.objects.get(email="kid3@school.org").user_id, registered.id)
+        self.assertFalse(User.objects.get(username="kid4@school.org").has_usable_password())
+
+    def roster(self, content):
+        f = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(os.unlink, f.name)
+        with f:
+            f.write(content)
+        return f.name
+
+
+class ReplicaRoutingTests(TestCase):
+    def test_router_sends_only_read_only_reads_to_the_replica(self):
+        router = db_routers.PrimaryReplicaRouter()
+        with mock.patch.dict(settings.DATABASES, {"replica": settings.DATABASES["default"]}):
+            self.assertEqual(router.db_for_read(Student), "default")
+            with db_routers.replica_reads():
+                self.assertEqual(router.db_for_read(Student), "replica")
+                self.assertEqual(router.db_for_write(Student), "default")
+        with db_routers.replica_reads():
+            self.assertEqual(router.db_for_read(Student), "default")  # no replica configured
+
+    def test_read_only_views_enable_replica_reads(self):
+        user = User.objects.create_user(username="rr", password="p")
+        Student.objects.create(user=user, name="rr", email="rr@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        seen = []
+        with mock.patch("core.views.load_progress", side_effect=lambda student_id: seen.append(
+                db_routers._replica_reads.get()) or {}):
+            self.assertEqual(self.client.get("/api/students/overview/").status_code, 200)
+        self.assertEqual(seen, [True])
+        self.assertFalse(db_routers._replica_reads.get())
+
+
+class AttemptRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()  # write throttle history from earlier tests
+        self.client = Client()
+        self.user = User.objects.create_user(username="roll", password="p", email="roll@example.com")
+        self.student = Student.objects.create(user=self.user, name="roll", email="roll@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.user)}"
+        self.course = Course.objects.create(name="Rollups", description="", difficulty=1)
+        self.l1 = Lesson.objects.create(course=self.course, title="One", tags=["a"], order_index=1)
+        self.l2 = Lesson.objects.create(course=self.course, title="Two", tags=["b"], order_index=2)
+
+    def post(self, lesson, timestamp, correctness, hints=0):
+        r = self.client.post("/api/attempts/", {"lesson": lesson.id, "timestamp": timestamp, "correctness": correctness,
+                                                "hints_used": hints, "duration_sec": 60},
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+
+    def course_entry(self):
+        return next(c for c in self.client.get("/api/courses/").json() if c["id"] == self.course.id)
+
+    def test_writes_accumulate_per_day(self):
+        self.post(self.l1, "2025-01-01T10:00:00Z", 0.4, hints=2)
+        self.post(self.l1, "2025-01-01T12:00:00Z", 0.8, hints=1)
+        self.post(self.l1, "2025-01-02T09:00:00Z", 1.0)
+        first, second = AttemptDailyRollup.objects.filter(student=self.student).order_by("day")
+        self.assertEqual((first.attempt_count, first.hints_sum, first.last_correctness), (2, 3, 0.8))
+        self.assertAlmostEqual(first.mean_correctness, 0.6)
+        self.assertEqual(second.attempt_count, 1)
+
+        lesson = self.course_entry()["lessons"][0]["latest_attempt"]
+        self.assertEqual((lesson["timestamp"], lesson["correctness"]), ("2025-01-02T09:00:00+00:00", 1.0))
+        self.assertEqual(StudentCourseProgress.objects.get(student=self.student, course=self.course).attempt_count, 1)
+
+    def test_orm_save_keeps_progress_in_step(self):
+        Attempt.objects.create(student=self.student, lesson=self.l2, timestamp=timezone.now(), correctness=0.9)
+        row = StudentCourseProgress.objects.get(student=self.student, course=self.course)
+        self.assertEqual(row.attempt_count, 1)
+        self.assertEqual(AttemptDailyRollup.objects.filter(student=self.student).count(), 1)
+
+    def test_archived_attempts_keep_progress_and_course_list(self):
+        old = (timezone.now() - timedelta(days=90)).isoformat()
+        self.post(self.l1, old, 0.5, hints=1)
+        before = self.course_entry()
+        out = StringIO()
+        call_command("archive_attempts", "--older-than-days", "30", stdout=out)
+        self.assertIn("Archived 1 attempts", out.getvalue())
+        self.assertFalse(Attempt.objects.exists())
+        self.assertEqual(ArchivedAttempt.objects.count(), 1)
+
+        # a later write to the same course recomputes progress from rollups, not raw rows
+        self.post(self.l2, timezone.now().isoformat(), 1.0)
+        row = StudentCourseProgress.objects.get(student=self.student, course=self.course)
+        self.assertEqual((row.attempt_count, row.hint_sum, row.covered_tags), (2, 1, ["a", "b"]))
+        self.assertEqual(self.course_entry()["lessons"][0], before["lessons"][0])
+
+        out = StringIO()
+        call_command("backfill_rollups", stdout=out)
+        self.assertIn("Skipped 1 students", out.getvalue())
+        self.assertEqual(AttemptDailyRollup.objects.filter(student=self.student).count(), 2)
+
+        AttemptDailyRollup.objects.filter(student=self.student, lesson=self.l1).delete()
+        call_command("backfill_rollups", "--force", stdout=StringIO())
+        self.assertEqual(AttemptDailyRollup.objects.filter(student=self.student).count(), 2)
+        self.assertEqual(StudentCourseProgress.objects.get(student=self.student, course=self.course).attempt_count, 2)
+
+    def test_backfill_matches_the_write_path(self):
+        self.post(self.l1, "2025-01-01T10:00:00Z", 0.4, hints=2)
+        first = Attempt.objects.get()
+        ArchivedAttempt.objects.create(id=first.id, student=self.student, lesson=self.l1, timestamp=first.timestamp,
+                                       correctness=0.4, hints_used=2, duration_sec=60, archived_at=timezone.now())
+        first.delete()
+        self.post(self.l1, "2025-01-01T12:00:00Z", 0.8, hints=1)
+        self.post(self.l2, "2025-01-02T09:00:00Z", 1.0)
+        rollups = lambda: list(AttemptDailyRollup.objects.order_by("day").values_list(*ROLLUP_COLUMNS))
+        written = rollups()
+        self.assertEqual([r[3] for r in written], [2, 1])
+        call_command("backfill_rollups", "--force", stdout=StringIO())
+        self.assertEqual(rollups(), written)
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(username="tags", password="p")
+        Student.objects.create(user=user, name="tags", email="tags@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        self.course = Course.objects.create(name="Tagged", description="", difficulty=1)
+        self.l1 = Lesson.objects.create(course=self.course, title="A", tags=["loops", "Arrays "], order_index=1)
+        self.l2 = Lesson.objects.create(course=self.course, title="B", tags=["loops"], order_index=2)
+
+    def test_index_follows_json_tags(self):
+        names = lambda lesson: sorted(LessonTag.objects.filter(lesson=lesson).values_list("tag__name", flat=True))
+        self.assertEqual(names(self.l1), ["arrays", "loops"])
+        self.l1.tags = ["recursion"]
+        self.l1.save()
+        self.assertEqual(names(self.l1), ["recursion"])
+
+    def test_lesson_list_filters_by_tag(self):
+        url = f"/api/lesson/{self.course.id}"
+        self.assertEqual([l["id"] for l in self.client.get(url, {"tag": "Loops"}).json()], [self.l1.id, self.l2.id])
+        self.assertEqual([l["id"] for l in self.client.get(url, {"tag": "arrays"}).json()], [self.l1.id])
+        self.assertEqual(self.client.get(url, {"tag": "graphs"}).json(), [])
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+    def test_vectorized_tag_gap_matches_scalar(self):
+        catalog = get_catalog()
+        row = catalog.courses.index(catalog.course(self.course.id))
+        self.assertEqual(catalog.course_tags.shape, (len(catalog.courses), len(catalog.tag_names)))
+        for covered in ([], ["loops"], ["loops", "Arrays "], ["graphs"]):
+            gaps = tag_gaps(catalog.course_tags, catalog.tag_mask(covered))
+            self.assertEqual(float(gaps[row]), tag_gap(covered, catalog.course(self.course.id).tags))
+
+    def test_catalog_tags_are_normalized_like_the_index(self):
+        Lesson.objects.create(course=self.course, title="C", tags=["Loops", "loops "], order_index=3)
+        catalog = get_catalog()
+        self.assertEqual(catalog.course(self.course.id).tags, frozenset({"arrays", "loops"}))
+        self.assertEqual(catalog.tag_names.count("loops"), 1)
+        self.assertNotIn("Loops", catalog.tag_names)
+        column = catalog.tag_index["loops"]
+        self.assertEqual(int(catalog.tag_column_ids[column]), Tag.objects.get(name="loops").id)
+        self.assertTrue(catalog.tag_mask(["LOOPS "])[column])
+
+
+class MasteryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        user = User.objects.create_user(username="mastery", password="p")
+        self.student = Student.objects.create(user=user, name="mastery", email="mastery@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        self.course = Course.objects.create(name="Mastered", description="", difficulty=1)
+        self.l1 = Lesson.objects.create(course=self.course, title="A", tags=["loops", "vars"], order_index=1)
+        self.l2 = Lesson.objects.create(course=self.course, title="B", tags=["loops"], order_index=2)
+
+    def post(self, lesson, correctness, hints=0, minute=0):
+        payload = {"lesson": lesson.id, "timestamp": f"2025-03-01T10:{minute:02d}:00Z",
+                   "correctness": correctness, "hints_used": hints}
+        self.assertEqual(self.client.post("/api/attempts/", data=payload, content_type="application/json").status_code, 200)
+
+    def vector_by_tag(self):
+        vector = unpack(StudentMastery.objects.get(student=self.student).vector)
+        return {name: float(vector[tag_id - 1]) for name, tag_id in get_catalog().tag_ids.items()
+                if tag_id <= len(vector) and not np.isnan(vector[tag_id - 1])}
+
+    def test_attempts_update_only_the_lessons_tags(self):
+        self.post(self.l1, 1.0)
+        self.assertEqual(self.vector_by_tag(), {"loops": 1.0, "vars": 1.0})
+        self.post(self.l2, 0.0, minute=1)
+        mastery = self.vector_by_tag()
+        self.assertAlmostEqual(mastery["loops"], 0.7, places=6)
+        self.assertEqual(mastery["vars"], 1.0)
+        self.assertAlmostEqual(attempt_score(1.0, 3), 0.5)
+
+        overview = self.client.get("/api/students/overview/").json()
+        self.assertEqual(overview["mastery"], {"loops": 0.7, "vars": 1.0})
+
+    def test_rebuild_matches_write_path(self):
+        self.post(self.l1, 0.8, hints=1)
+        self.post(self.l2, 0.4, minute=1)
+        written = self.vector_by_tag()
+        self.assertEqual(sum(rebuild_mastery(student_ids=[self.student.id])), 1)
+        rebuilt = self.vector_by_tag()
+        self.assertEqual(written.keys(), rebuilt.keys())
+        for tag in written:
+            self.assertAlmostEqual(written[tag], rebuilt[tag], places=6)
+
+    def test_vector_is_packed_float32(self):
+        vector = np.array([0.25, np.nan, 1.0], dtype=np.float32)
+        self.assertEqual(len(pack(vector)), 12)
+        np.testing.assert_array_equal(unpack(pack(vector)), vector)
+        self.assertEqual(len(unpack(b"")), 0)
+
+
+class NextLessonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        user = User.objects.create_user(username="next", password="p")
+        self.student = Student.objects.create(user=user, name="next", email="next@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        self.course = Course.objects.create(name="Ordered", description="", difficulty=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lessons = [
+                Lesson.objects.create(course=self.course, title=title, tags=[], order_index=i)
+                for i, title in enumerate(["One", "Two", "Three"], start=1)
+            ]
+
+    def post(self, lesson, correctness):
+        payload = {"lesson": lesson.id, "timestamp": timezone.now().isoformat(), "correctness": correctness}
+        self.assertEqual(self.client.post("/api/attempts/", data=payload, content_type="application/json").status_code, 200)
+
+    def next_up(self):
+        courses = self.client.get("/api/students/overview/").json()["courses"]
+        return next(c["next_up"] for c in courses if c["id"] == self.course.id)
+
+    def test_pointer_advances_past_mastered_lessons(self):
+        one, two, three = self.lessons
+        self.assertEqual(self.next_up(), "One")
+        self.post(one, 0.5)
+        self.assertEqual(self.next_up(), "One")
+        self.post(one, 0.9)
+        self.post(three, 1.0)
+        self.assertEqual(self.next_up(), "Two")
+        recommendation = self.client.get("/api/students/recommendation/").json()["recommendation"]
+        self.assertEqual(recommendation["title"], 'Continue "Ordered" — Two')
+        self.post(two, 0.8)
+        self.assertIsNone(self.next_up())
+
+    def test_reordering_lessons_moves_the_pointer(self):
+        one, two, three = self.lessons
+        self.post(one, 1.0)
+        pointer = lambda: StudentCourseProgress.objects.get(student=self.student).next_lesson_id
+        self.assertEqual(pointer(), two.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            three.order_index = 0
+            three.save()
+            two.title = "Renamed"
+            two.save()
+        self.assertEqual(pointer(), three.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            three.delete()
+        self.assertEqual(pointer(), two.id)
+
+    def test_title_edit_and_course_delete_refresh_at_most_once(self):
+        with mock.patch("core.services.progress.refresh_next_lessons") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.lessons[0].title = "Renamed"
+                self.lessons[0].save()
+            refresh.assert_not_called()
+            course_id = self.course.id
+            with self.captureOnCommitCallbacks(execute=True):
+                self.course.delete()
+            refresh.assert_called_once_with([course_id])
+
+    def test_refresh_survives_a_rolled_back_savepoint(self):
+        other = Course.objects.create(name="Other", description="", difficulty=1)
+        with mock.patch("core.services.progress.refresh_next_lessons") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        Lesson.objects.create(course=self.course, title="Gone", tags=[], order_index=9)
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+                Lesson.objects.create(course=other, title="Kept", tags=[], order_index=1)
+            refresh.assert_called_once_with([other.id])
@@ -1,15 +1,38 @@
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
-from django.db.models import Avg
-from .models import Student, Course, Lesson, Attempt
-from .serializers import CourseSerializer, AttemptCreateSerializer, LessonSerializer
-from .services.recommender import score_candidate, to_confidence
+from django.db import transaction
+from .authentication import StudentJWTAuthentication
+from .conditional import student_conditional
+from .db_routers import read_only_method, replica_reads
+from .models import Lesson, Attempt
+from .pagination import AttemptCursorPagination
+from .serializers import AttemptCreateSerializer, AttemptBatchItemSerializer
+from .services.analysis_cache import analyze_cached
+from .services.analysis_pool import AnalysisError, run_analysis
+from .services.catalog import get_catalog
+from .services.attempts import ATTEMPT_UPSERT_FIELDS, upsert_attempts
+from .services.recommendation_snapshots import fresh_snapshot
+from .services.metrics import render_prometheus
+from .services.progress import record_attempt, record_attempts
+from .services.mastery import mastery_vector, record_mastery
+from .services.rollups import record_rollups
+from .services.tags import lesson_ids_with_tag
+from .services.dashboard import (
+    CONCURRENT_LOADS, SECTIONS, isolated, course_list_payload, load_latest_rollups, load_progress, overview_payload, recommendation_payload,
+)
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import status
-import ast
-from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework import serializers, status
+import json
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.generics import GenericAPIView
 
 
@@ -18,299 +41,244 @@ class WriteThrottle(UserRateThrottle):
     rate = '30/min'
 
 
+class BatchWriteThrottle(UserRateThrottle):
+    # a whole batch counts as one request, tracked separately from single writes
+    scope = 'attempt_batch'
+    rate = '10/min'
+
+
 class StudentOverviewView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @read_only_method
+    @student_conditional("overview")
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-        except Student.DoesNotExist:
+        student = request.student
+        if student is None:
             return Response({'detail': 'Student record not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        courses = Course.objects.prefetch_related('lessons').all()
-        data = []
-
-        for course in courses:
-            attempts = Attempt.objects.filter(student=student, lesson__course=course).order_by('-timestamp')
-            progress = min(100, attempts.count() * 10)
-            last_activity = attempts.first().timestamp.isoformat() if attempts.exists() else None
-            next_up = course.lessons.first().title if course.lessons.exists() else None
-
-            data.append({
-                'id': course.id,
-                'name': course.name,
-                'description': course.description,
-                'difficulty': course.difficulty,
-                'progress': progress,
-                'last_activity': last_activity,
-                'next_up': next_up,
-            })
-
-        return Response({
-            'student': {
-                'id': student.id,
-                'name': student.name,
-                'email': student.email,
-            },
-            'courses': data,
-        }, status=status.HTTP_200_OK)
+        # catalog from the cached snapshot; the only query is the student's denormalized progress rows
+        payload = overview_payload(student, get_catalog(), load_progress(student.id))
+        return Response(payload, status=status.HTTP_200_OK)
 
 
 class StudentRecommendationView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @read_only_method
+    @student_conditional("recommendation", daily=True)
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-        except Student.DoesNotExist:
+        student = request.student
+        if student is None:
             return Response({'detail': 'Student record not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        courses = Course.objects.all()
-        items = []
-
-        for course in courses:
-            attempts = Attempt.objects.filter(student=student, lesson__course=course).order_by('-timestamp')
-            progress = min(100, attempts.count() * 10)
-            recency_gap_days = 5.0
-            tag_gap = 0.3
-            hint_rate = (attempts.aggregate(avg=Avg('hints_used'))['avg'] or 0) / 3.0
-            score, features = score_candidate(progress, recency_gap_days, tag_gap, hint_rate)
-
-            items.append({
-                'id': str(course.id),
-                'title': f'Continue "{course.name}" — next lesson',
-                'score': score,
-                'features': features
-            })
-
-        if not items:
+        # nightly snapshot when still valid, otherwise computed live
+        catalog = get_catalog()
+        source = 'snapshot'
+        payload = fresh_snapshot(student.id, catalog)
+        if payload is None:
+            source = 'live'
+            payload = recommendation_payload(catalog, load_progress(student.id), timezone.now(), mastery_vector(student))
+        if payload is None:
             return Response({'detail': 'No recommendations available'}, status=status.HTTP_200_OK)
-
-        items.sort(key=lambda x: x['score'], reverse=True)
-        top = items[0]
-        alts = items[1:3]
-
-        return Response({
-            'recommendation': {'id': top['id'], 'title': top['title']},
-            'confidence': to_confidence(top['score']),
-            'reason_features': top['features'],
-            'alternatives': [{'id': a['id'], 'title': a['title']} for a in alts],
-        }, status=status.HTTP_200_OK)
+        return Response(payload, status=status.HTTP_200_OK, headers={'X-Recommendation-Source': source})
 
 
 class AttemptCreateView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
     throttle_classes = [WriteThrottle]
+    pagination_class = AttemptCursorPagination
 
     def get(self, request):
-        try:
-            student = Student.objects.get(user=request.user)
-        except Student.DoesNotExist:
+        """
+        Attempt history, newest first, cursor-paginated (?cursor=, ?page_size=).
+        Filters: ?since=<ISO datetime>, ?lesson=<id>. ?stream=ndjson streams every matching
+        attempt as newline-delimited JSON with flat memory use instead of paging.
+        """
+        student = request.student
+        if student is None:
             return Response({"detail": "Student record not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        attempts_qs = Attempt.objects.filter(student=student).order_by("-timestamp")
-        serializer = AttemptCreateSerializer(attempts_qs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        attempts_qs = Attempt.objects.filter(student=student)
+
+        since = request.query_params.get("since")
+        if since:
+            since_dt = parse_datetime(since)
+            if since_dt is None:
+                return Response({"detail": "since must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since_dt):
+                since_dt = timezone.make_aware(since_dt)
+            attempts_qs = attempts_qs.filter(timestamp__gte=since_dt)
+
+        lesson = request.query_params.get("lesson")
+        if lesson:
+            if not lesson.isdigit():
+                return Response({"detail": "lesson must be an integer id"}, status=status.HTTP_400_BAD_REQUEST)
+            attempts_qs = attempts_qs.filter(lesson_id=int(lesson))
+
+        if request.query_params.get("stream") == "ndjson":
+            return self.stream(attempts_qs.order_by("-timestamp", "-id"))
+
+        page = self.paginate_queryset(attempts_qs)
+        serializer = AttemptCreateSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @staticmethod
+    def stream(attempts_qs, chunk_size=2000):
+        as_datetime = serializers.DateTimeField()
+        rows = attempts_qs.values(
+            "id", "student_id", "lesson_id", "timestamp", "correctness", "hints_used", "duration_sec",
+        ).iterator(chunk_size=chunk_size)
+
+        def lines():
+            for row in rows:
+                yield json.dumps({
+                    "id": row["id"],
+                    "student": row["student_id"],
+                    "lesson": row["lesson_id"],
+                    "timestamp": as_datetime.to_representation(row["timestamp"]),
+                    "correctness": row["correctness"],
+                    "hints_used": row["hints_used"],
+                    "duration_sec": row["duration_sec"],
+                }) + "\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
 
     def post(self, request):
         # extract authenticated student from token
-        try:
-            student = Student.objects.get(user=request.user)
-        except Student.DoesNotExist:
+        student = request.student
+        if student is None:
             return Response({"detail": "Student record not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        data = request.data.copy()
-        data["student"] = student.id
-
-        serializer = AttemptCreateSerializer(data=data)
+        serializer = AttemptCreateSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        lesson_id = data.get("lesson")
-        if not lesson_id:
-            return Response({"detail": "Lesson ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+        attempt = Attempt(student=student, **serializer.validated_data)
+        with transaction.atomic():
+            upsert_attempts([attempt])
+            record_rollups([attempt])
+            record_mastery(student.id, [attempt], get_catalog())
+            record_attempt(attempt)
+        return Response(AttemptCreateSerializer(attempt).data, status=status.HTTP_200_OK)
+
+
+class AttemptBatchView(GenericAPIView):
+    """
+    POST /api/attempts/batch/
+    Body: {"attempts": [{lesson, timestamp, correctness, hints_used?, duration_sec?}, ...]}
+    Upserts every valid item (same (student, lesson) semantics as POST /api/attempts/) and
+    reports a per-item status: created, updated, duplicate (superseded later in the batch) or error.
+    """
+    authentication_classes = [StudentJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [BatchWriteThrottle]
+    max_items = 500
+
+    def post(self, request):
+        student = request.student
+        if student is None:
+            return Response({"detail": "Student record not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        items = request.data.get("attempts") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty \"attempts\" list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"detail": f"At most {self.max_items} attempts per batch"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        latest = {}  # lesson id -> (index, validated data); later items win, as with sequential posts
+        for i, item in enumerate(items):
+            serializer = AttemptBatchItemSerializer(data=item)
+            if not serializer.is_valid():
+                results[i] = {"index": i, "status": "error", "errors": serializer.errors}
+                continue
+            lesson_id = serializer.validated_data["lesson"]
+            if lesson_id in latest:
+                results[latest[lesson_id][0]] = {"index": latest[lesson_id][0], "status": "duplicate"}
+            latest[lesson_id] = (i, serializer.validated_data)
+
+        course_by_lesson = dict(Lesson.objects.filter(id__in=latest).values_list("id", "course_id"))
+        for lesson_id in [l for l in latest if l not in course_by_lesson]:
+            i, _ = latest.pop(lesson_id)
+            results[i] = {"index": i, "status": "error", "errors": {"lesson": ["Invalid pk - object does not exist."]}}
+
+        # only used to label items; the write itself is a single upsert guarded by the unique constraint
+        existing = set(
+            Attempt.objects.filter(student=student, lesson_id__in=latest).values_list("lesson_id", flat=True)
+        )
+        written = []
+        for lesson_id, (i, data) in latest.items():
+            attempt = Attempt(student=student, lesson_id=lesson_id, **{f: data[f] for f in ATTEMPT_UPSERT_FIELDS})
+            written.append((i, "updated" if lesson_id in existing else "created", attempt))
 
-        existing = Attempt.objects.filter(student=student, lesson_id=lesson_id).first()
+        with transaction.atomic():
+            upsert_attempts([a for _, _, a in written])
+            record_rollups(a for _, _, a in written)
+            if latest:
+                record_mastery(student.id, [a for _, _, a in written], get_catalog())
+                record_attempts(student.id, (course_by_lesson[l] for l in latest))
 
-        if existing:
-            serializer = AttemptCreateSerializer(existing, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        for i, label, attempt in written:
+            results[i] = {"index": i, "status": label, "id": attempt.id}
 
-        attempt = serializer.save()
-        return Response({"id": attempt.id}, status=status.HTTP_201_CREATED)
+        counts = {label: sum(1 for r in results if r["status"] == label)
+                  for label in ("created", "updated", "duplicate", "error")}
+        code = status.HTTP_200_OK if latest else status.HTTP_400_BAD_REQUEST
+        return Response({**counts, "results": results}, status=code)
 
 
 class AnalyzeCodeView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         code = request.data.get("code", "")
-        issues = []
-
         try:
-            tree = ast.parse(code)
-
-            class ArgVisitor(ast.NodeVisitor):
-                def visit_FunctionDef(self, node):
-                    arg_names = [a.arg for a in node.args.args]
-                    used = set()
-
-                    class UseVisitor(ast.NodeVisitor):
-                        def visit_Name(self, n):
-                            if isinstance(n.ctx, ast.Load):
-                                used.add(n.id)
-
-                    UseVisitor().visit(node)
-                    for a in arg_names:
-                        if a not in used:
-                            issues.append({
-                                "rule": "unused-arg",
-                                "message": f'Function arg "{a}" appears unused.',
-                                "severity": "info",
-                            })
-
-            ArgVisitor().visit(tree)
-
-            class ExceptVisitor(ast.NodeVisitor):
-                def visit_ExceptHandler(self, node):
-                    if node.type is None:
-                        issues.append({
-                            "rule": "bare-except",
-                            "message": "Avoid bare except; catch specific exceptions.",
-                            "severity": "warn",
-                        })
-
-            ExceptVisitor().visit(tree)
-
-            class PrintVisitor(ast.NodeVisitor):
-                def visit_Call(self, node):
-                    if getattr(getattr(node, "func", None), "id", None) == "print":
-                        issues.append({
-                            "rule": "print-call",
-                            "message": "Avoid print statements; use logging instead.",
-                            "severity": "info",
-                        })
-
-            PrintVisitor().visit(tree)
-
-        except SyntaxError as e:
-            issues.append({
-                "rule": "syntax-error",
-                "message": str(e),
-                "severity": "error",
-            })
-
-        return Response({"issues": issues}, status=status.HTTP_200_OK)
+            issues, hit = analyze_cached(code, runner=run_analysis)
+        except AnalysisError as e:
+            response = Response({"detail": str(e)}, status=e.status_code)
+            if e.retry_after:
+                response["Retry-After"] = str(e.retry_after)
+            return response
+
+        response = Response({"issues": issues}, status=status.HTTP_200_OK)
+        response["X-Analysis-Cache"] = "HIT" if hit else "MISS"
+        return response
 
 
 class CourseListView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @read_only_method
+    @student_conditional("courses")
     def get(self, request):
         # fetch student
-        try:
-            student = Student.objects.get(user=request.user)
-        except Student.DoesNotExist:
+        student = request.student
+        if student is None:
             return Response({"detail": "Student record not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # fetch courses + lessons once to avoid N+1
-        courses = Course.objects.prefetch_related("lessons").all()
-
-        # fetch all attempts for this student once and pick latest per lesson
-        attempts_qs = (
-            Attempt.objects
-            .filter(student=student)
-            .select_related("lesson")
-            .order_by("-timestamp")
-        )
-        latest_attempt_by_lesson = {}
-        for a in attempts_qs:
-            if a.lesson_id not in latest_attempt_by_lesson:
-                latest_attempt_by_lesson[a.lesson_id] = a
-
-        payload = []
-        for c in courses:
-            lessons = list(c.lessons.all().order_by("order_index"))
-            lesson_list = []
-            for l in lessons:
-                last = latest_attempt_by_lesson.get(l.id)
-                last_attempt = None
-                if last:
-                    last_attempt = {
-                        "id": last.id,
-                        "timestamp": last.timestamp.isoformat(),
-                        "correctness": last.correctness,
-                        "hints_used": last.hints_used,
-                        "duration_sec": last.duration_sec,
-                        "progress": getattr(last, "progress", None),
-                    }
-
-                lesson_list.append({
-                    "id": l.id,
-                    "title": l.title,
-                    "order_index": l.order_index,
-                    "tags": l.tags,
-                    "latest_attempt": last_attempt,
-                })
-
-            # compute course-level progress as average of latest correctness per lesson (0..100)
-            total_lessons = len(lessons)
-            if total_lessons == 0:
-                progress = 0
-            else:
-                sum_correctness = 0.0
-                for l in lessons:
-                    a = latest_attempt_by_lesson.get(l.id)
-                    if a and a.correctness is not None:
-                        try:
-                            val = float(a.correctness)
-                        except (TypeError, ValueError):
-                            val = 0.0
-                        val = max(0.0, min(1.0, val))
-                        sum_correctness += val
-                    else:
-                        sum_correctness += 0.0
-                progress = int((sum_correctness / total_lessons) * 100)
-
-            # last activity for the course is the most recent attempt timestamp among its lessons
-            timestamps = [
-                latest_attempt_by_lesson[l.id].timestamp
-                for l in lessons
-                if l.id in latest_attempt_by_lesson
-            ]
-            course_last_activity = max(timestamps).isoformat() if timestamps else None
-
-            payload.append({
-                "id": c.id,
-                "name": c.name,
-                "description": c.description,
-                "difficulty": c.difficulty,
-                "progress": progress,
-                "last_activity": course_last_activity,
-                "lessons": lesson_list,
-            })
-
+        # courses + ordered lessons from the catalog snapshot, overlaid with the student's newest rollup per lesson
+        payload = course_list_payload(get_catalog(), load_latest_rollups(student.id))
         return Response(payload, status=status.HTTP_200_OK)
 
 
 class CourseDetailView(GenericAPIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @read_only_method
     def get(self, request, id: str):
         # include lessons with tags and order
-        course = get_object_or_404(Course.objects.prefetch_related("lessons"), pk=id)
-        lessons = list(course.lessons.all().order_by("order_index").values(
-            "id", "title", "tags", "order_index"
-        ))
+        course = get_catalog().course(id)
+        if course is None:
+            raise Http404("No Course matches the given query.")
+        lessons = [l.as_dict() for l in course.lessons]
         payload = {
             "id": course.id,
             "name": course.name,
@@ -323,19 +291,24 @@ class CourseDetailView(GenericAPIView):
 
 class LessonListView(GenericAPIView):
     '''
-    Request : course_id
+    Request : course_id, optional ?tag=<name>
     Response : lessons
     '''
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StudentJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @read_only_method
     def get(self, request, course_id: str):
         try:
-            # Get all lessons for a specific course
-            lessons = Lesson.objects.filter(course_id=course_id).order_by("order_index")
-
-            serializer = LessonSerializer(lessons, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Get all lessons for a specific course (an unknown course has none)
+            course = get_catalog().course(course_id)
+            lessons = course.lessons if course else ()
+            tag = request.query_params.get("tag")
+            if tag is not None and course:
+                # matching ids through the (tag, lesson) index; order and payload from the catalog
+                tagged = set(lesson_ids_with_tag(course.id, tag))
+                lessons = [l for l in lessons if l.id in tagged]
+            return Response([l.as_dict() for l in lessons], status=status.HTTP_200_OK)
 
         except Lesson.DoesNotExist:
             return Response(
@@ -348,3 +321,71 @@ class LessonListView(GenericAPIView):
                 {"detail": f"Error retrieving lessons: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class MetricsView(APIView):
+    '''
+    Prometheus text exposition of this process's request histograms (staff only).
+    '''
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _authenticate_student(request):
+    """Run the DRF student authentication outside DRF; returns ``(user, student)`` or ``(None, None)``."""
+    auth = StudentJWTAuthentication()
+    result = auth.authenticate(Request(request))
+    return (result[0], auth.student) if result else (None, None)
+
+
+class StudentDashboardView(View):
+    '''
+    Request : ?sections=overview,recommendation,courses (default: all)
+    Response : {section: payload of the matching endpoint}
+
+    Async so the independent loads (catalog, progress rows, latest attempts) run concurrently
+    once the student is authenticated a single time.
+    '''
+
+    async def get(self, request):
+        requested = request.GET.get("sections")
+        sections = [s.strip() for s in requested.split(",") if s.strip()] if requested else list(SECTIONS)
+        unknown = sorted(set(sections) - set(SECTIONS))
+        if unknown:
+            return JsonResponse({"detail": f"Unknown sections: {', '.join(unknown)}"}, status=400)
+
+        try:
+            user, student = await sync_to_async(_authenticate_student)(request)
+        except APIException as e:
+            return JsonResponse({"detail": e.detail}, status=e.status_code)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        if student is None:
+            return JsonResponse({"detail": "Student record not found"}, status=404)
+
+        def load(fn, *args):
+            if CONCURRENT_LOADS:
+                return sync_to_async(isolated(fn), thread_sensitive=False)(*args)
+            return sync_to_async(fn)(*args)
+
+        wants_progress = "overview" in sections or "recommendation" in sections
+        with replica_reads():
+            catalog, progress, attempts = await asyncio.gather(
+                load(get_catalog),
+                load(load_progress, student.id) if wants_progress else asyncio.sleep(0, {}),
+                load(load_latest_rollups, student.id) if "courses" in sections else asyncio.sleep(0, {}),
+            )
+
+        payload = {}
+        if "overview" in sections:
+            payload["overview"] = overview_payload(student, catalog, progress)
+        if "recommendation" in sections:
+            payload["recommendation"] = (
+                recommendation_payload(catalog, progress, timezone.now(), mastery_vector(student))
+                or {'detail': 'No recommendations available'}
+            )
+        if "courses" in sections:
+            payload["courses"] = course_list_payload(catalog, attempts)
+        return JsonResponse(payload)
@@ -1,27 +1,26 @@
 #!/usr/bin/env bash
 set -e
 
-host="db"
-port=5432
-
-until python - <<PY
+# DATABASE_URL is only known at run time, so the schema and demo data are set up here, not in the image
+if [ -n "${DATABASE_URL}" ]; then
+  until python - <<PY
 import socket, sys
-s=socket.socket()
+from urllib.parse import urlparse
+url = urlparse("${DATABASE_URL}")
+s = socket.socket()
 try:
-  s.connect(("${host}", ${port}))
+  s.connect((url.hostname or "db", url.port or 5432))
   s.close()
 except Exception:
   sys.exit(1)
 PY
-do
-  echo "Waiting for postgres..."
-  sleep 1
-done
+  do
+    echo "Waiting for postgres..."
+    sleep 1
+  done
+fi
 
-python manage.py makemigrations
-python manage.py migrate
 python manage.py migrate --noinput
 python manage.py seed_demo || true
-python manage.py collectstatic --noinput || true
 
 exec "$@"
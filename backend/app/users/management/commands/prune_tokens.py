@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.services.revocation import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches (schedule it nightly, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        blacklisted = outstanding = 0
+        for b, o in prune_expired(batch_size=options['batch_size']):
+            blacklisted += b
+            outstanding += o
+        elapsed = time.perf_counter() - started
+        rate = (blacklisted + outstanding) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {outstanding} outstanding and {blacklisted} blacklisted tokens in {elapsed:.2f}s ({rate:.0f} rows/s).'
+        ))
@@ -1,3 +1,4 @@
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
@@ -27,9 +28,13 @@ class UserSerializer(serializers.ModelSerializer):
         return f"{getattr(obj, 'first_name', '')} {getattr(obj, 'last_name', '')}".strip()
 
     def get_student_id(self, obj):
-        from core.models import Student
-        student = Student.objects.filter(user_id=obj.id).only("id").first()
-        return student.id if student else None
+        # callers that already know the id pass it in context={"student_id": ...}
+        if "student_id" in self.context:
+            return self.context["student_id"]
+        try:
+            return obj.student.id  # no query when loaded with select_related("student")
+        except ObjectDoesNotExist:
+            return None
 
 
 class RegisterResponseSerializer(serializers.Serializer):
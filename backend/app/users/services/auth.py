@@ -1,15 +1,20 @@
+import time
 from typing import Dict, Optional, Tuple
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
+from core.authentication import STUDENT_ID_CLAIM
 from core.models import Student
+from core.services import metrics
+
+from users.services import revocation
 
 User = get_user_model()
 
@@ -19,6 +24,38 @@ COOKIE_SECURE = getattr(settings, "AUTH_REFRESH_COOKIE_SECURE", False)
 COOKIE_SAMESITE = getattr(settings, "AUTH_REFRESH_COOKIE_SAMESITE", None)
 COOKIE_MAX_AGE = getattr(settings, "AUTH_REFRESH_COOKIE_AGE", 30 * 24 * 60 * 60)
 
+PROFILE_CLAIMS = (STUDENT_ID_CLAIM, "email", "full_name")
+# when the profile claims were last read from the User; rotation carries them forward until
+# they are older than PROFILE_CLAIMS_MAX_AGE seconds, then re-reads the row
+PROFILE_AT_CLAIM = "profile_at"
+PROFILE_CLAIMS_MAX_AGE = getattr(settings, "AUTH_PROFILE_CLAIMS_MAX_AGE", 60 * 60)
+
+# What registering an email does, given the User and Student already found for it. Shared by
+# register_user and the bulk roster import so both link accounts the same way.
+LINK_EXISTS = "exists"            # both exist and are linked: rejected
+LINK_NEW_STUDENT = "new_student"  # only the user exists: create the student
+LINK_NEW_USER = "new_user"        # only the student exists: create the user and link it
+LINK_NEW_BOTH = "new_both"        # neither exists
+LINK_ATTACH = "attach"            # both exist, student has no user: link them
+LINK_NONE = "none"                # student is linked to a different user: left untouched
+
+
+def link_action(user, student) -> str:
+    if user and student:
+        if student.user_id == user.id:
+            return LINK_EXISTS
+        return LINK_ATTACH if student.user_id is None else LINK_NONE
+    if user:
+        return LINK_NEW_STUDENT
+    if student:
+        return LINK_NEW_USER
+    return LINK_NEW_BOTH
+
+
+def split_full_name(full_name: str) -> Tuple[str, str]:
+    parts = (full_name or "").strip().split(" ", 1)
+    return (parts[0] if parts else ""), (parts[1] if len(parts) > 1 else "")
+
 
 class AuthService:
     @staticmethod
@@ -27,30 +64,17 @@ class AuthService:
         if not email:
             raise ValidationError("Email required.")
 
-        parts = (full_name or "").strip().split(" ", 1)
-        first_name = parts[0] if parts else ""
-        last_name = parts[1] if len(parts) > 1 else ""
+        first_name, last_name = split_full_name(full_name)
 
         with transaction.atomic():
             user = User.objects.filter(email=email).first()
             student = Student.objects.filter(email=email).first()
+            action = link_action(user, student)
 
-            # both exist and connected → reject
-            if user and student and student.user_id == user.id:
+            if action == LINK_EXISTS:
                 raise ValidationError("User already exists.")
 
-            # only user exists → create or update student
-            elif user and not student:
-                student, _ = Student.objects.update_or_create(
-                    email=email,
-                    defaults={
-                        "user": user,
-                        "name": full_name.strip(),
-                    },
-                )
-
-            # only student exists → create user, link, update student
-            elif student and not user:
+            if action in (LINK_NEW_USER, LINK_NEW_BOTH):
                 user = User.objects.create_user(
                     username=email,
                     email=email,
@@ -58,19 +82,8 @@ class AuthService:
                     last_name=last_name,
                     password=password,
                 )
-                student.user = user
-                student.name = full_name.strip()
-                student.save(update_fields=["user", "name"])
 
-            # neither exist → create both safely
-            elif not user and not student:
-                user = User.objects.create_user(
-                    username=email,
-                    email=email,
-                    first_name=first_name,
-                    last_name=last_name,
-                    password=password,
-                )
+            if action in (LINK_NEW_STUDENT, LINK_NEW_BOTH):
                 student, _ = Student.objects.update_or_create(
                     email=email,
                     defaults={
@@ -78,31 +91,78 @@ class AuthService:
                         "name": full_name.strip(),
                     },
                 )
-
-            # both exist but not linked → link and update student
-            elif user and student and not student.user:
+            elif action in (LINK_NEW_USER, LINK_ATTACH):
                 student.user = user
                 student.name = full_name.strip()
                 student.save(update_fields=["user", "name"])
 
+        # cache the student on the user so serializers/token claims need no further query; with
+        # LINK_NONE the email's student belongs to someone else and the lookup is left to student_id_for
+        if student is not None and student.user_id == user.id:
+            user.student = student
         #  Return the User instance (not a dict)
         return user
 
     @staticmethod
     def authenticate_user(email: str, password: str):
         email = (email or "").strip().lower()
-        user = User.objects.filter(username=email).first()
+        # the student rides along in the same query (user.student, or DoesNotExist without a query)
+        user = User.objects.select_related("student").filter(username=email).first()
 
         if not user or not user.check_password(password):
             raise ValidationError("Invalid credentials")
 
-        student = Student.objects.filter(user=user).first()
-
         return user
 
     @staticmethod
-    def generate_jwt_tokens(user: User) -> Dict[str, str]:
+    def student_id_for(user: User) -> Optional[int]:
+        """No query when the reverse relation was loaded (select_related or register_user)."""
+        try:
+            return user.student.id
+        except Student.DoesNotExist:
+            return None
+
+    @staticmethod
+    def add_profile_claims(token, user: User, student_id: Optional[int]) -> None:
+        # student_id lets StudentJWTAuthentication resolve request.student by primary key;
+        # the profile claims let /me/ answer without touching the database
+        token[STUDENT_ID_CLAIM] = student_id
+        token["email"] = user.email
+        token["full_name"] = f"{user.first_name} {user.last_name}".strip()
+        token[PROFILE_AT_CLAIM] = int(time.time())
+
+    @staticmethod
+    def _renew_stale_profile_claims(refresh_obj) -> None:
+        """Re-read the User (one query) when the token's profile claims are missing or past PROFILE_CLAIMS_MAX_AGE."""
+        read_at = refresh_obj.get(PROFILE_AT_CLAIM)
+        if read_at is not None and time.time() - read_at < PROFILE_CLAIMS_MAX_AGE:
+            return
+        user = (
+            User.objects.select_related("student")
+            .filter(**{jwt_settings.USER_ID_FIELD: refresh_obj.get(jwt_settings.USER_ID_CLAIM)}).first()
+        )
+        if user is None:
+            raise TokenError("User not found for refresh token.")
+        AuthService.add_profile_claims(refresh_obj, user, AuthService.student_id_for(user))
+
+    @staticmethod
+    def profile_from_claims(token) -> Optional[Dict]:
+        """The UserSerializer payload rebuilt from token claims, or None for tokens issued without them."""
+        if token is None or any(claim not in token for claim in PROFILE_CLAIMS):
+            return None
+        return {
+            "id": token[jwt_settings.USER_ID_CLAIM],
+            "email": token["email"],
+            "full_name": token["full_name"],
+            "student_id": token[STUDENT_ID_CLAIM],
+        }
+
+    @staticmethod
+    def generate_jwt_tokens(user: User, student_id: Optional[int] = None) -> Dict[str, str]:
+        if student_id is None:
+            student_id = AuthService.student_id_for(user)
         refresh = RefreshToken.for_user(user)
+        AuthService.add_profile_claims(refresh, user, student_id)
         return {"access": str(refresh.access_token), "refresh": str(refresh)}
 
     @staticmethod
@@ -123,35 +183,64 @@ class AuthService:
 
     @staticmethod
     def refresh_access_from_refresh_token(refresh_token: str) -> Tuple[str, Optional[str]]:
-        # will raise TokenError if token is invalid/expired
-        refresh_obj = RefreshToken(refresh_token)
-        new_access = str(refresh_obj.access_token)
-        new_refresh_str = None
+        started = time.perf_counter()
+        outcome = "invalid"
+        try:
+            new_access, new_refresh_str = AuthService._refresh(refresh_token)
+            outcome = "rotated" if new_refresh_str else "refreshed"
+            return new_access, new_refresh_str
+        except revocation.TokenRevoked:
+            outcome = "revoked"
+            raise
+        finally:
+            metrics.observe("auth_token_refresh_seconds", outcome, time.perf_counter() - started)
 
+    @staticmethod
+    def _refresh(refresh_token: str) -> Tuple[str, Optional[str]]:
         rotate = getattr(jwt_settings, "ROTATE_REFRESH_TOKENS", False)
         blacklist_after = getattr(jwt_settings, "BLACKLIST_AFTER_ROTATION", False)
 
-        if rotate:
-            user_id = refresh_obj.get("user_id")
-            user = User.objects.filter(pk=user_id).first()
-            if not user:
-                raise TokenError("User not found for refresh token rotation.")
-            new_refresh = RefreshToken.for_user(user)
-            new_refresh_str = str(new_refresh)
-            if blacklist_after:
-                try:
-                    refresh_obj.blacklist()
-                except Exception:
-                    pass
+        if not (rotate and blacklist_after):
+            # will raise TokenError if token is invalid/expired/blacklisted
+            refresh_obj = RefreshToken(refresh_token)
+            AuthService._renew_stale_profile_claims(refresh_obj)
+            new_access = str(refresh_obj.access_token)
+            if not rotate:
+                return new_access, None
+            return new_access, str(AuthService._rotated(refresh_obj, outstanding=True))
 
-        return new_access, new_refresh_str
+        # signature and expiry are checked here; revocation only against the recently-revoked cache
+        refresh_obj = revocation.RotatingRefreshToken(refresh_token)
+        AuthService._renew_stale_profile_claims(refresh_obj)
+        new_access = str(refresh_obj.access_token)
+        new_refresh = AuthService._rotated(refresh_obj, outstanding=False)
+        try:
+            with transaction.atomic():
+                # the authoritative check: blacklisting fails if another request already rotated this token
+                if not revocation.revoke(refresh_obj):
+                    raise revocation.TokenRevoked("Token is blacklisted")
+                revocation.outstand(new_refresh)
+        except IntegrityError as e:
+            # deferred FK check: the user behind the token no longer exists
+            raise TokenError("User not found for refresh token rotation.") from e
+        return new_access, str(new_refresh)
+
+    @staticmethod
+    def _rotated(refresh_obj, outstanding: bool) -> RefreshToken:
+        """Successor refresh token built from the old token's claims (renewed first when stale)."""
+        new_refresh = RefreshToken()  # fresh jti, iat and exp
+        for claim in (jwt_settings.USER_ID_CLAIM, jwt_settings.REVOKE_TOKEN_CLAIM, *PROFILE_CLAIMS, PROFILE_AT_CLAIM):
+            if claim in refresh_obj:
+                new_refresh[claim] = refresh_obj[claim]
+        if outstanding:
+            revocation.outstand(new_refresh)
+        return new_refresh
 
     @staticmethod
     def blacklist_refresh_token(refresh_token: str) -> None:
         try:
-            rt = RefreshToken(refresh_token)
-            rt.blacklist()
-        except Exception:
+            revocation.revoke(revocation.RotatingRefreshToken(refresh_token))
+        except TokenError:
             pass
 
     @staticmethod
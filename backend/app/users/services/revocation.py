@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+REVOKED_CACHE_SIZE = getattr(settings, "AUTH_REVOKED_CACHE_SIZE", 10_000)
+# optional shared cache so a JTI revoked by one worker is rejected by the others without a query
+REVOKED_CACHE_ALIAS = getattr(settings, "AUTH_REVOKED_CACHE_ALIAS", "default")
+
+_revoked: "OrderedDict[str, float]" = OrderedDict()  # jti -> exp (epoch seconds)
+_lock = threading.Lock()
+
+
+class TokenRevoked(TokenError):
+    pass
+
+
+def _cache_key(jti: str) -> str:
+    return f"jwt:revoked:{jti}"
+
+
+def remember_revoked(jti: str, exp: float) -> None:
+    ttl = exp - time.time()
+    if ttl <= 0:
+        return
+    with _lock:
+        _revoked[jti] = exp
+        _revoked.move_to_end(jti)
+        while len(_revoked) > REVOKED_CACHE_SIZE:
+            _revoked.popitem(last=False)
+    if REVOKED_CACHE_ALIAS:
+        caches[REVOKED_CACHE_ALIAS].set(_cache_key(jti), 1, int(ttl) + 1)
+
+
+def recently_revoked(jti: str) -> bool:
+    """Positive-only cache lookup: True means revoked; False means "ask the database"."""
+    with _lock:
+        exp = _revoked.get(jti)
+    if exp is not None:
+        return exp > time.time()
+    return bool(REVOKED_CACHE_ALIAS and caches[REVOKED_CACHE_ALIAS].get(_cache_key(jti)))
+
+
+def clear_local() -> None:
+    with _lock:
+        _revoked.clear()
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    RefreshToken whose verification consults only the revoked-JTI cache. Used solely on the
+    rotation path, where ``revoke`` performs the authoritative blacklist check atomically.
+    """
+
+    def check_blacklist(self) -> None:
+        if recently_revoked(self.payload[jwt_settings.JTI_CLAIM]):
+            raise TokenRevoked("Token is blacklisted")
+
+
+def outstand(token) -> OutstandingToken:
+    """Record a freshly minted token in the outstanding list without loading its User."""
+    return OutstandingToken.objects.create(
+        user_id=token.get(jwt_settings.USER_ID_CLAIM),
+        jti=token[jwt_settings.JTI_CLAIM],
+        token=str(token),
+        created_at=token.current_time,
+        expires_at=datetime_from_epoch(token["exp"]),
+    )
+
+
+def revoke(token) -> bool:
+    """Blacklist ``token``; returns False if it already was (i.e. a reused refresh token)."""
+    jti, exp = token[jwt_settings.JTI_CLAIM], token["exp"]
+    try:
+        # savepoint=False: on the rotation path this joins the caller's transaction, which is
+        # rolled back anyway when the token turns out to be revoked
+        with transaction.atomic(savepoint=False):
+            row = OutstandingToken.objects.filter(jti=jti).values_list("id", "blacklistedtoken__id").first()
+            outstanding_id, blacklisted_id = row if row is not None else (outstand(token).id, None)
+            if blacklisted_id is None:
+                BlacklistedToken.objects.create(token_id=outstanding_id)
+        created = blacklisted_id is None
+    except IntegrityError:
+        # a concurrent request revoked the same token first
+        created = False
+    remember_revoked(jti, exp)
+    return created
+
+
+def revoke_user_tokens(user_id) -> int:
+    """Blacklist every live outstanding token of a user (deactivation, deletion)."""
+    live = list(
+        OutstandingToken.objects.filter(user_id=user_id, expires_at__gt=timezone.now(), blacklistedtoken__isnull=True)
+        .values_list("id", "jti", "expires_at")
+    )
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token_id=pk) for pk, _, _ in live], ignore_conflicts=True)
+    for _, jti, expires_at in live:
+        remember_revoked(jti, expires_at.timestamp())
+    return len(live)
+
+
+def prune_expired(batch_size: int = 5000) -> Iterator[Tuple[int, int]]:
+    """
+    Delete expired outstanding tokens (and their blacklist rows) one batch per transaction,
+    yielding ``(blacklisted, outstanding)`` deletions per batch.
+    """
+    now = timezone.now()
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic():
+            # no signal receivers on either model, so the cascade is a single fast DELETE
+            _, per_model = OutstandingToken.objects.filter(id__in=ids).delete()
+        yield per_model.get(BlacklistedToken._meta.label, 0), per_model.get(OutstandingToken._meta.label, 0)
@@ -0,0 +1,165 @@
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+
+from core.models import Student
+from users.services.auth import (
+    LINK_ATTACH, LINK_EXISTS, LINK_NEW_BOTH, LINK_NEW_STUDENT, LINK_NEW_USER, LINK_NONE,
+    link_action, split_full_name,
+)
+
+User = get_user_model()
+
+# accepted header spellings, first match wins
+NAME_COLUMNS = ("full_name", "name")
+EMAIL_COLUMNS = ("email",)
+PASSWORD_COLUMNS = ("password",)
+
+
+@dataclass
+class RosterRow:
+    line: int
+    full_name: str
+    email: str
+    password: str
+
+
+def _column(fieldnames: List[str], candidates, required: bool) -> Optional[str]:
+    lowered = {name.strip().lower(): name for name in fieldnames or []}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    if required:
+        raise ValueError(f"Roster needs a {candidates[0]!r} column (found: {', '.join(fieldnames or []) or 'none'})")
+    return None
+
+
+def read_roster(stream: TextIO) -> Iterable[RosterRow]:
+    """Rows of a CSV roster with ``full_name`` (or ``name``), ``email`` and an optional ``password`` column."""
+    reader = csv.DictReader(stream)
+    name_col = _column(reader.fieldnames, NAME_COLUMNS, required=True)
+    email_col = _column(reader.fieldnames, EMAIL_COLUMNS, required=True)
+    password_col = _column(reader.fieldnames, PASSWORD_COLUMNS, required=False)
+    for row in reader:
+        yield RosterRow(
+            line=reader.line_num,
+            full_name=(row.get(name_col) or "").strip(),
+            email=(row.get(email_col) or "").strip().lower(),
+            password=(row.get(password_col) or "") if password_col else "",
+        )
+
+
+def _hash(password: str) -> str:
+    # an empty password gets an unusable hash: the student signs in after a reset
+    return make_password(password or None)
+
+
+def hash_passwords(passwords: List[str], workers: int) -> List[str]:
+    """PBKDF2 is CPU-bound, so it is spread over worker processes; ``workers <= 0`` hashes inline."""
+    if workers <= 0 or len(passwords) < 2:
+        return [_hash(p) for p in passwords]
+    # children are forked: drop our connections first so none is shared across processes
+    connections.close_all()
+    chunksize = max(1, len(passwords) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash, passwords, chunksize=chunksize))
+
+
+def _by_email(queryset, emails: List[str], batch_size: int) -> Dict[str, object]:
+    # the first row per email, like register_user's filter(email=...).first()
+    found = {}
+    for i in range(0, len(emails), batch_size):
+        for obj in queryset.filter(email__in=emails[i:i + batch_size]).order_by("-id"):
+            found[obj.email] = obj
+    return found
+
+
+def import_roster(rows: Iterable[RosterRow], workers: int = 0, batch_size: int = 1000) -> dict:
+    """
+    Create and link Users and Students for a roster in bulk, applying ``link_action`` per email
+    like ``AuthService.register_user``. Existing rows are matched by email with a few
+    ``IN`` queries, passwords are hashed across ``workers`` processes, and writes go through
+    ``bulk_create``/``bulk_update`` in one transaction. Rows that would violate a constraint
+    (no email, a repeated email, a taken username, a user that already has a student) are
+    skipped and reported instead of aborting the import.
+    """
+    counts = {
+        "rows": 0, "users_created": 0, "students_created": 0, "students_linked": 0,
+        "existing": 0, "unchanged": 0, "skipped": 0,
+    }
+    errors = []
+    unique: Dict[str, RosterRow] = {}
+    for row in rows:
+        counts["rows"] += 1
+        if not row.email:
+            errors.append(f"line {row.line}: missing email")
+        elif row.email in unique:
+            errors.append(f"line {row.line}: duplicate of line {unique[row.email].line} ({row.email})")
+        else:
+            unique[row.email] = row
+            continue
+        counts["skipped"] += 1
+
+    emails = list(unique)
+    users = _by_email(User.objects.all(), emails, batch_size)
+    students = _by_email(Student.objects.all(), emails, batch_size)
+
+    plan = {email: link_action(users.get(email), students.get(email)) for email in emails}
+    new_user_emails = [e for e in emails if plan[e] in (LINK_NEW_USER, LINK_NEW_BOTH)]
+    taken = set()
+    for i in range(0, len(new_user_emails), batch_size):
+        taken.update(User.objects.filter(username__in=new_user_emails[i:i + batch_size])
+                     .values_list("username", flat=True))
+    for email in sorted(taken):
+        errors.append(f"line {unique[email].line}: username {email} belongs to a user with another email")
+        plan[email] = None
+        counts["skipped"] += 1
+    new_user_emails = [e for e in new_user_emails if e not in taken]
+
+    # Student.user is one-to-one: an existing user already holding another student cannot be linked
+    linking = {users[e].id: e for e in emails if plan[e] in (LINK_NEW_STUDENT, LINK_ATTACH)}
+    user_ids = list(linking)
+    for i in range(0, len(user_ids), batch_size):
+        for user_id in Student.objects.filter(user_id__in=user_ids[i:i + batch_size]).values_list("user_id", flat=True):
+            email = linking[user_id]
+            errors.append(f"line {unique[email].line}: user {email} already has a student with another email")
+            plan[email] = None
+            counts["skipped"] += 1
+
+    hashes = dict(zip(new_user_emails, hash_passwords([unique[e].password for e in new_user_emails], workers)))
+
+    with transaction.atomic():
+        new_users = []
+        for email in new_user_emails:
+            first_name, last_name = split_full_name(unique[email].full_name)
+            new_users.append(User(username=email, email=email, first_name=first_name,
+                                  last_name=last_name, password=hashes[email]))
+        for user in User.objects.bulk_create(new_users, batch_size=batch_size):
+            users[user.email] = user
+
+        new_students, linked = [], []
+        for email in emails:
+            action, name = plan[email], unique[email].full_name
+            if action in (LINK_NEW_STUDENT, LINK_NEW_BOTH):
+                new_students.append(Student(user=users[email], name=name, email=email))
+            elif action in (LINK_NEW_USER, LINK_ATTACH):
+                student = students[email]
+                student.user, student.name = users[email], name
+                linked.append(student)
+            elif action == LINK_EXISTS:
+                counts["existing"] += 1
+            elif action == LINK_NONE:
+                counts["unchanged"] += 1
+        Student.objects.bulk_create(new_students, batch_size=batch_size)
+        Student.objects.bulk_update(linked, ["user", "name"], batch_size=batch_size)
+
+    counts["users_created"] = len(new_users)
+    counts["students_created"] = len(new_students)
+    counts["students_linked"] = len(linked)
+    counts["errors"] = errors
+    return counts
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from users.services import revocation
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def revoke_on_deactivation(sender, instance, created, **kwargs):
+    # rotation no longer reads the User row, so a deactivated account's refresh tokens are revoked here
+    if not created and not instance.is_active:
+        revocation.revoke_user_tokens(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def revoke_on_delete(sender, instance, **kwargs):
+    revocation.revoke_user_tokens(instance.pk)
@@ -1,3 +1,4 @@
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
@@ -5,7 +6,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
 
 from .serializers import (
     RegisterSerializer,
@@ -14,6 +15,8 @@ from .serializers import (
 )
 from .services.auth import AuthService
 
+User = get_user_model()
+
 
 class RegisterView(GenericAPIView):
     permission_classes = (AllowAny,)
@@ -32,12 +35,13 @@ class RegisterView(GenericAPIView):
         except ValidationError as e:
             return Response({"status": 0, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        tokens = AuthService.generate_jwt_tokens(user)
+        student_id = AuthService.student_id_for(user)
+        tokens = AuthService.generate_jwt_tokens(user, student_id=student_id)
 
         resp_payload = {
             "status": 1,
             "message": "User registered successfully",
-            "user": UserSerializer(user).data,
+            "user": UserSerializer(user, context={"student_id": student_id}).data,
             "token": tokens.get("access"),
         }
         resp = Response(resp_payload, status=status.HTTP_201_CREATED)
@@ -62,14 +66,15 @@ class LoginView(GenericAPIView):
         except ValidationError:
             return Response({"status": 0, "error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        tokens = AuthService.generate_jwt_tokens(user)
+        student_id = AuthService.student_id_for(user)
+        tokens = AuthService.generate_jwt_tokens(user, student_id=student_id)
 
         resp = Response(
             {
                 "status": 1,
                 "message": "Login successful",
                 "token": tokens.get("access"),
-                "user": UserSerializer(user).data,
+                "user": UserSerializer(user, context={"student_id": student_id}).data,
             },
             status=status.HTTP_200_OK,
         )
@@ -79,11 +84,20 @@ class LoginView(GenericAPIView):
 
 
 class MeView(GenericAPIView):
+    # stateless: request.user is a TokenUser built from the token, no database access
+    authentication_classes = (JWTStatelessUserAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = UserSerializer
 
     def get(self, request, *args, **kwargs):
-        return Response({"status": 1, "user": UserSerializer(request.user).data}, status=status.HTTP_200_OK)
+        user = AuthService.profile_from_claims(request.auth)
+        if user is None:
+            # token issued before profile claims existed
+            db_user = User.objects.select_related("student").filter(pk=request.user.id).first()
+            if db_user is None:
+                return Response({"status": 0, "error": "User not found"}, status=status.HTTP_401_UNAUTHORIZED)
+            user = UserSerializer(db_user).data
+        return Response({"status": 1, "user": user}, status=status.HTTP_200_OK)
 
 
 class RefreshView(GenericAPIView):
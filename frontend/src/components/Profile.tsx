@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { api } from "@/lib/api";
+import { api, getAllPages } from "@/lib/api";
 import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, BarElement, Title, Tooltip, Legend, ArcElement } from "chart.js";
 import { Line, Bar, Pie, Doughnut } from "react-chartjs-2";
 
@@ -37,12 +37,11 @@ export default function ProfilePage() {
       try {
         const [pRes, aRes] = await Promise.all([
           api.get("/api/profile/").catch(() => null),
-          api.get("/api/attempts/").catch(() => null),
+          getAllPages<Attempt>("/api/attempts/").catch(() => null),
         ]);
         if (!mounted) return;
         if (pRes && pRes.data) setProfile(pRes.data);
-        if (aRes && Array.isArray(aRes.data)) setAttempts(aRes.data);
-        else if (aRes && aRes.data?.results) setAttempts(aRes.data.results);
+        if (aRes) setAttempts(aRes);
       } catch (err) {
         setError("Failed to load profile or attempt data");
       } finally {
@@ -61,6 +61,26 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// -------------------------------------------------------------
+// Helper: GET every page of a cursor-paginated list
+// Follows `next` until it runs out and returns the concatenated
+// `results`; a bare array response is returned as is
+// -------------------------------------------------------------
+export async function getAllPages<T = any>(path: string, pageSize = 500): Promise<T[]> {
+  const items: T[] = [];
+  let url: string | null = path;
+  let params: Record<string, any> | undefined = { page_size: pageSize };
+  while (url) {
+    const res: { data: any } = await api.get(url, { params });
+    if (Array.isArray(res.data)) return [...items, ...res.data];
+    items.push(...(res.data?.results ?? []));
+    // `next` is an absolute URL that already carries the cursor and page_size
+    url = res.data?.next ?? null;
+    params = undefined;
+  }
+  return items;
+}
+
 // -------------------------------------------------------------
 // Usage examples elsewhere in your frontend:
 //
@@ -3,7 +3,7 @@ import { Button } from "@/components/ui/button";
 import CoursesGrid from "@/components/CoursesGrid";
 import { recommendNext } from "@/ai/recommender";
 import { formatExplanation } from "@/ai/explain";
-import { api } from "@/lib/api";
+import { api, getAllPages } from "@/lib/api";
 import {
   Dialog,
   DialogContent,
@@ -27,10 +27,13 @@ export default function Dashboard() {
   useEffect(() => {
     let mounted = true;
 
-    async function tryFetch(backendPath: string, staticPath: string) {
+    async function tryFetch(
+      backendPath: string,
+      staticPath: string,
+      get: (path: string) => Promise<any> = async (path) => (await api.get(path)).data
+    ) {
       try {
-        const resp = await api.get(backendPath);
-        return resp.data;
+        return await get(backendPath);
       } catch (err) {
         try {
           const r = await fetch(staticPath);
@@ -49,13 +52,15 @@ export default function Dashboard() {
         const [c, s, a] = await Promise.all([
           tryFetch("/api/courses/", "/data/courses.json"),
           tryFetch("/api/students/overview/", "/data/students.json"),
-          tryFetch("/api/attempts/", "/data/attempts.json"),
+          // /api/attempts/ is cursor-paginated; walk every page so the recommender sees the full history
+          tryFetch("/api/attempts/", "/data/attempts.json", getAllPages),
         ]);
 
         if (!mounted) return;
         setCourses(Array.isArray(c) ? c : []);
         setStudents(Array.isArray(s) ? s : []);
-        setAttempts(Array.isArray(a) ? a : []);
+        const attemptList = Array.isArray(a) ? a : [];
+        setAttempts(attemptList);
 
         const student =
           Array.isArray(s) && s.length
@@ -72,7 +77,7 @@ export default function Dashboard() {
           setShowGreeting(true);
         }
 
-        const rec = recommendNext({ student, courses: c, attempts: a });
+        const rec = recommendNext({ student, courses: c, attempts: attemptList });
 
         setExplain(formatExplanation(rec));
       } catch (err) {